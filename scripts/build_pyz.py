@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Build cx.pyz, a single-file zipapp of Claude eXtend and its dependencies."""
+
+import argparse
+import compileall
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def build(output: Path) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp) / 'app'
+        subprocess.run(
+            [sys.executable, '-m', 'pip', 'install', '--quiet', '--no-compile',
+             '--target', str(staging), str(ROOT)],
+            check=True
+        )
+        shutil.rmtree(staging / 'bin', ignore_errors=True)
+
+        # zipimport only picks up legacy-layout bytecode (module.pyc next to
+        # module.py), not __pycache__. Sources stay in the archive so other
+        # interpreter versions fall back to compiling them.
+        compileall.compile_dir(str(staging), quiet=1, legacy=True)
+
+        zipapp.create_archive(
+            staging,
+            target=output,
+            interpreter='/usr/bin/env python3',
+            main='claude_extend.main:main'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', '-o', type=Path, default=ROOT / 'dist' / 'cx.pyz',
+                        help='Path of the archive to write (default: dist/cx.pyz)')
+    args = parser.parse_args()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    build(args.output)
+    print(f"Built {args.output}")
+
+
+if __name__ == '__main__':
+    main()
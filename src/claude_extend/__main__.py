@@ -0,0 +1,5 @@
+"""Allow running Claude eXtend with ``python -m claude_extend``."""
+
+from .main import main
+
+main()
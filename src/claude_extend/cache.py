@@ -0,0 +1,43 @@
+"""Persistent on-disk cache for state reused across cx invocations."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+
+def get_cache_path() -> Path:
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    base = Path(cache_home) if cache_home else Path.home() / '.cache'
+    return base / 'claude-extend' / 'state.json'
+
+
+def make_key(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_state(key: str) -> Optional[dict]:
+    try:
+        with open(get_cache_path(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get('key') != key:
+        return None
+    return state.get('data')
+
+
+def save_state(key: str, data: dict) -> None:
+    cache_path = get_cache_path()
+    tmp_path = cache_path.with_suffix('.tmp')
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'data': data}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is an optimization only; an unwritable cache dir is not an error.
+        pass
@@ -0,0 +1,305 @@
+"""Optional background server that runs cx commands without a fresh interpreter per call."""
+
+import array
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import traceback
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_HEADER = struct.Struct('!i')
+_STDIO_FDS = (0, 1, 2)
+# How long a client gets to send its request before the daemon moves on.
+_REQUEST_TIMEOUT = 5.0
+
+
+def get_socket_path() -> Path:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'claude-extend.sock'
+    # The temp dir is shared with other users, so the socket goes in a
+    # directory of our own that serve() creates and both sides check.
+    return Path(tempfile.gettempdir()) / f'claude-extend-{os.getuid()}' / 'claude-extend.sock'
+
+
+def _is_private_dir(path: Path) -> bool:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _is_own_socket(path: Path) -> bool:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _detach() -> None:
+    # Started as `cx --daemon &`, the daemon sits in a background process group
+    # of the shell's terminal, and a command reading the client's tty from there
+    # would be stopped with SIGTTIN. A new session has no controlling terminal,
+    # so the terminals passed in by clients are never ours.
+    try:
+        os.setsid()
+    except PermissionError:
+        # Already a process group leader, so a child starts the session. This
+        # process stays behind as the shell's job and passes on the signals
+        # that would have stopped the daemon, so `kill %N` still works.
+        child = os.fork()
+        if child == 0:
+            os.setsid()
+            return
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, lambda received, _frame: os.kill(child, received))
+        _, status = os.waitpid(child, 0)
+        os._exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1)
+
+
+def _daemon_running(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def _warm_config_cache() -> None:
+    from .utils import _config_candidates, get_config_path, load_external_tools_config
+
+    # Parse the tools config once here so every forked command finds it in
+    # the cache; a changed file is still re-read, since entries are keyed on
+    # mtime and size.
+    config_path = get_config_path()
+    # The candidate locations depend on HOME, which each request sets itself.
+    _config_candidates.cache_clear()
+    if config_path:
+        try:
+            load_external_tools_config(config_path)
+        except (OSError, ValueError):
+            pass
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message")
+        data += chunk
+    return data
+
+
+def _recv_request(conn: socket.socket) -> Tuple[dict, List[int]]:
+    fds = array.array('i')
+    header, ancdata, _flags, _addr = conn.recvmsg(
+        _HEADER.size, socket.CMSG_LEN(len(_STDIO_FDS) * fds.itemsize)
+    )
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - len(data) % fds.itemsize])
+
+    if len(header) < _HEADER.size:
+        header += _recv_exact(conn, _HEADER.size - len(header))
+    (length,) = _HEADER.unpack(header)
+    return json.loads(_recv_exact(conn, length)), list(fds)
+
+
+def _interrupt_when_client_leaves(conn: socket.socket) -> None:
+    # The client never sends anything after its request, so a return from
+    # recv() means it went away (usually Ctrl+C). Interrupt the command so an
+    # open menu doesn't keep reading from the client's terminal.
+    try:
+        conn.recv(1)
+    except OSError:
+        pass
+    os.kill(os.getpid(), signal.SIGINT)
+
+
+def _run_request(request: dict, fds: List[int]) -> int:
+    from .main import _build_parser, main
+    from .utils import print_message
+
+    for target, fd in zip(_STDIO_FDS, fds):
+        os.dup2(fd, target)
+    os.environ.clear()
+    os.environ.update(request['env'])
+    os.chdir(request['cwd'])
+    sys.argv = ['cx'] + request['argv']
+
+    try:
+        args, _unknown = _build_parser(request['argv']).parse_known_args(request['argv'])
+        if args.daemon:
+            print_message('error', "A cx daemon is already running; start new ones with cx, not cx-client.")
+            return 2
+        main()
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def _handle_connection(server: socket.socket, conn: socket.socket) -> None:
+    # A client that connects and never sends its request must not hold up
+    # everyone else waiting in the accept loop.
+    conn.settimeout(_REQUEST_TIMEOUT)
+    try:
+        request, fds = _recv_request(conn)
+    except (OSError, ValueError):
+        return
+    conn.settimeout(None)
+
+    try:
+        # Each command runs in a forked child: imports are already warm, but
+        # registry state and stdio never leak from one command to the next.
+        if os.fork() != 0:
+            return
+
+        code = 1
+        try:
+            server.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            threading.Thread(target=_interrupt_when_client_leaves, args=(conn,), daemon=True).start()
+            code = _run_request(request, fds)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            conn.sendall(_HEADER.pack(code))
+        finally:
+            os._exit(code)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def serve(socket_path: Optional[Path] = None) -> None:
+    from .utils import print_message
+
+    if not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'):
+        print_message('error', "Daemon mode is only supported on Unix-like systems.")
+        sys.exit(1)
+
+    # Pay for every import once, up front, so forked commands start warm.
+    from . import cache, main, tools  # noqa: F401
+    try:
+        import questionary  # noqa: F401
+    except ImportError:
+        pass
+
+    path = Path(socket_path) if socket_path else get_socket_path()
+    if socket_path is None:
+        try:
+            path.parent.mkdir(mode=0o700, exist_ok=True)
+        except OSError as e:
+            print_message('error', f"Cannot create daemon socket directory {path.parent}: {e}")
+            sys.exit(1)
+    if not _is_private_dir(path.parent):
+        print_message('error', f"{path.parent} must be a directory owned by you and not accessible to others.")
+        sys.exit(1)
+
+    if _daemon_running(path):
+        print_message('error', f"A cx daemon is already running on {path}")
+        sys.exit(1)
+
+    _detach()
+
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(str(path))
+    finally:
+        os.umask(old_umask)
+    server.listen()
+
+    _warm_config_cache()
+
+    # Children report their exit code over the socket, so they are reaped
+    # automatically instead of being waited on.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: sys.exit(0))
+    print_message('info', f"cx daemon listening on {path}")
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                _handle_connection(server, conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def forward(argv: List[str], socket_path: Optional[Path] = None) -> Optional[int]:
+    path = Path(socket_path) if socket_path else get_socket_path()
+    # The request carries the environment and our stdio, so only hand it to a
+    # socket another user could not have put there.
+    if not (_is_private_dir(path.parent) and _is_own_socket(path)):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+
+    with sock:
+        payload = json.dumps({'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ)}).encode('utf-8')
+        fds = array.array('i', _STDIO_FDS)
+        # A closed stdio fd can't be passed, and the daemon may have gone away
+        # since connect(); either way the caller runs the command itself.
+        try:
+            sock.sendmsg([_HEADER.pack(len(payload))], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+            sock.sendall(payload)
+        except OSError:
+            return None
+
+        try:
+            (code,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+        except KeyboardInterrupt:
+            return 130
+        except OSError:
+            return 1
+    return code
+
+
+def client_main() -> None:
+    code = forward(sys.argv[1:])
+    if code is None:
+        from .main import main
+
+        main()
+        return
+    sys.exit(code)
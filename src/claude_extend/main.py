@@ -2,38 +2,66 @@
 """Claude eXtend (cx) - CLI tool for managing MCP server connections with Claude Code."""
 
 import argparse
+import json
+import re
 import sys
+from typing import TYPE_CHECKING, Optional
 
 from . import __version__
-from .tools import MCPToolRegistry
-from .utils import print_message, validate_environment, validate_interactive_environment
-
-
-def cmd_list(_args, registry: MCPToolRegistry) -> None:
-    tools = registry.list_tools()
-    installed = registry.get_installed_tools()
-
-    print("🔧 Available MCP Tools")
-    print("======================")
-    print()
+from .utils import format_message, print_message, validate_environment, validate_interactive_environment
+
+if TYPE_CHECKING:
+    from .tools import MCPToolRegistry
+
+
+def cmd_list(args, registry: "MCPToolRegistry") -> None:
+    tools, installed = registry.snapshot()
+    prerequisites = registry.get_prerequisite_status(refresh=args.refresh_cache)
+
+    if args.json:
+        payload = [
+            {
+                'name': name,
+                'description': tool.description,
+                'command': tool.command,
+                'installed': name in installed,
+                'prereq_ok': prerequisites[name],
+            }
+            for name, tool in tools.items()
+        ]
+        json.dump(payload, sys.stdout, separators=(',', ':'))
+        sys.stdout.write("\n")
+        return
 
     if not tools:
+        print("🔧 Available MCP Tools")
+        print("======================")
+        print()
         print_message('info', "No tools available in registry.")
         return
 
+    # Build the whole listing and write it in one call. Prerequisite warnings
+    # are buffered separately and still go to stderr, so stdout stays plain.
+    lines = ["🔧 Available MCP Tools", "======================", ""]
+    warnings = []
     for name, tool in tools.items():
         status = "✅ INSTALLED" if name in installed else "⭕ AVAILABLE"
-        print(f"{status}  {name} - {tool.description}")
-        if not tool.check_prerequisites():
-            print_message('warning', f"   Prerequisites missing: {tool.command} not found. Please install {tool.command} first.")
-        print()
-
-    print(f"Total: {len(tools)} tools ({len(installed)} installed)")
-    print()
-    print("💡 Tip: Use 'cx add --interactive' or 'cx remove --interactive' for guided tool management")
-
-
-def cmd_add(args, registry: MCPToolRegistry) -> None:
+        lines.append(f"{status}  {name} - {tool.description}")
+        if not prerequisites[name]:
+            command = tool.command
+            warnings.append(format_message('warning', f"{name}: Prerequisites missing: {command} not found. Please install {command} first."))
+        lines.append("")
+
+    lines.append(f"Total: {len(tools)} tools ({len(installed)} installed)")
+    lines.append("")
+    lines.append("💡 Tip: Use 'cx add --interactive' or 'cx remove --interactive' for guided tool management")
+    sys.stdout.write("\n".join(lines) + "\n")
+    if warnings:
+        sys.stdout.flush()
+        sys.stderr.write("\n".join(warnings) + "\n")
+
+
+def cmd_add(args, registry: "MCPToolRegistry") -> None:
     if args.interactive:
         return cmd_add_interactive(args, registry)
 
@@ -44,10 +72,12 @@ def cmd_add(args, registry: MCPToolRegistry) -> None:
     if not validate_environment():
         sys.exit(1)
 
+    # Tools named on the command line go straight to `claude mcp add`, which
+    # reports duplicates itself, so `claude mcp list` never has to run.
     tools = registry.list_tools()
-    _process_tools(args.tools, tools, registry, "install", lambda tool, **kwargs: tool.install(**kwargs))
+    _process_tools(args.tools, tools, registry, "install", args.jobs, skip_check=True)
 
-def cmd_remove(args, registry: MCPToolRegistry) -> None:
+def cmd_remove(args, registry: "MCPToolRegistry") -> None:
     if args.interactive:
         return cmd_remove_interactive(args, registry)
 
@@ -59,37 +89,93 @@ def cmd_remove(args, registry: MCPToolRegistry) -> None:
         sys.exit(1)
 
     tools = registry.list_tools()
-    _process_tools(args.tools, tools, registry, "remove", lambda tool, **kwargs: tool.remove(**kwargs))
+    _process_tools(args.tools, tools, registry, "remove")
+
+_SIMPLE_MENU_MAX_TOOLS = 20
+_SELECTION_RE = re.compile(r'(\d+)|([^,\s]+)')
+
+
+def _format_tool_menu(tool_list: tuple, labels: dict, prompt: str) -> str:
+    lines = [prompt]
+    lines.extend(f"  {i}) {labels[name]}" for i, name in enumerate(tool_list, 1))
+    lines.append("  a) Select all")
+    lines.append("  q) Quit")
+    lines.append("Enter numbers separated by commas, 'a' for all, or 'q' to quit: ")
+    return "\n".join(lines)
+
+
+def _parse_selection(selection: str, tool_list: list) -> Optional[list]:
+    if selection == 'a':
+        return list(tool_list)
+
+    tokens = _SELECTION_RE.findall(selection)
+    indices = [int(number) - 1 for number, _ in tokens if number]
+    invalid = [bad for _, bad in tokens if bad]
+    invalid += [str(i + 1) for i in indices if not 0 <= i < len(tool_list)]
+
+    if invalid or not indices:
+        print_message('error', f"Invalid selection: '{', '.join(invalid)}'. Enter numbers between 1 and {len(tool_list)}.")
+        return None
+
+    return [tool_list[i] for i in dict.fromkeys(indices)]
+
+
+def _prompt_numbered_selection(labels: dict, prompt: str) -> Optional[list]:
+    # Labels don't change while the menu is open, so the menu text is built
+    # once and rewritten as-is after each invalid entry.
+    tool_list = tuple(labels)
+    menu = _format_tool_menu(tool_list, labels, prompt)
+    while True:
+        sys.stderr.write(menu)
+        sys.stderr.flush()
+        try:
+            selection = input().strip().lower()
+        except EOFError:
+            return None
+
+        if selection == 'q':
+            return None
+        selected = _parse_selection(selection, tool_list)
+        if selected:
+            return selected
+
 
 def _get_user_tool_selection(
     tools: dict,
-    registry: MCPToolRegistry,
+    installed: frozenset,
+    registry: "MCPToolRegistry",
     prompt: str,
-    filter_func,
+    select_installed: bool,
     cancel_message: str = "Operation cancelled."
 ) -> list:
-    import questionary
+    prereq_map = registry.get_prerequisite_status()
 
-    choices = []
+    labels = {}
     for name, tool in tools.items():
         description = f"{name} - {tool.description}"
 
-        is_installed = tool.is_installed(registry=registry)
-        if is_installed:
+        if name in installed:
             description += " (already installed)"
-        elif not tool.check_prerequisites():
+        elif not prereq_map[name]:
             description += " ⚠️  (prerequisites missing)"
         else:
-            description += " (not installed)" if "remove" in prompt.lower() else ""
+            description += " (not installed)" if select_installed else ""
 
-        choices.append(questionary.Choice(title=description, value=name))
+        labels[name] = description
 
     try:
-        selected = questionary.checkbox(
-            prompt,
-            choices=choices,
-            instruction="(Use arrow keys to navigate, space to select, enter to confirm, ctrl+c to cancel)"
-        ).ask()
+        # A plain numbered menu avoids importing questionary (and prompt_toolkit)
+        # for the common case of a handful of tools.
+        if len(tools) <= _SIMPLE_MENU_MAX_TOOLS:
+            selected = _prompt_numbered_selection(labels, prompt)
+        else:
+            import questionary
+
+            selected = questionary.checkbox(
+                prompt,
+                choices=[questionary.Choice(title=label, value=name) for name, label in labels.items()],
+                instruction="(Use arrow keys to navigate, space to select, enter to confirm, ctrl+c to cancel)"
+            ).ask()
 
         if selected is None:
             print_message('info', cancel_message)
@@ -97,11 +183,10 @@ def _get_user_tool_selection(
 
         filtered_selected = []
         for tool_name in selected:
-            tool = tools[tool_name]
-            if filter_func(tool, registry):
+            if (tool_name in installed) == select_installed:
                 filtered_selected.append(tool_name)
             else:
-                status = "is already installed" if "install" in prompt.lower() else "is not installed"
+                status = "is not installed" if select_installed else "is already installed"
                 print_message('info', f"{tool_name} {status}, skipping.")
 
         return filtered_selected
@@ -110,117 +195,191 @@ def _get_user_tool_selection(
         print_message('info', cancel_message)
         return []
 
-def _process_tools(tool_names: list, tools: dict, registry: MCPToolRegistry, action_name: str, action_func) -> None:
-    print_message('info', f"{action_name.capitalize()}ing {len(tool_names)} MCP tool(s)...")
+def _process_tools(tool_names: list, tools: dict, registry: "MCPToolRegistry", action_name: str, jobs: int = 1,
+                   skip_check: bool = False) -> None:
+    is_install = action_name == "install"
+    if is_install:
+        progressive, past_tense, completion_word = "Installing", "installed", "installation"
+    else:
+        progressive, past_tense, completion_word = "Removing", "removed", "removal"
+
+    # Per-tool message fragments are fixed for the whole run.
+    success_suffix = f" {past_tense} successfully"
+    fail_prefix = f"✗ Failed to {action_name} "
+    available_str = ', '.join(tools.keys())
+    action_kwargs = {'skip_check': skip_check} if skip_check else {}
+
+    print_message('info', f"{progressive} {len(tool_names)} MCP tool(s)...")
     print()
 
+    prerequisites = registry.get_prerequisite_status(tool_names) if is_install else {}
+
+    # With --jobs, every runnable install is started up front; the loop below
+    # then reports the results in the order the tools were requested.
+    results = {}
+    if is_install and jobs > 1:
+        results = registry.install_many([name for name in tool_names if prerequisites.get(name)], jobs=jobs,
+                                        **action_kwargs)
+
     for tool_name in tool_names:
         tool = tools.get(tool_name)
         if not tool:
             print_message('error', f"Unknown tool: {tool_name}")
-            print_message('info', f"Available tools: {', '.join(tools.keys())}")
+            print_message('info', f"Available tools: {available_str}")
             continue
 
         print_message('info', f"Processing: {tool.description}")
 
-        if action_name == "install" and not tool.check_prerequisites():
-            print_message('error', f"Prerequisites not met for {tool_name}. {tool.command} not found. Please install {tool.command} first.")
-            print_message('error', f"✗ Failed to {action_name} {tool_name}")
-        elif action_func(tool, registry=registry):
-            past_tense = "installed" if action_name == "install" else "removed"
-            print_message('success', f"✓ {tool_name} {past_tense} successfully")
+        if is_install and not prerequisites[tool_name]:
+            command = tool.command
+            print_message('error', f"Prerequisites not met for {tool_name}. {command} not found. Please install {command} first.")
+            success = False
+        elif tool_name in results:
+            success = results[tool_name]
+        else:
+            success = getattr(tool, action_name)(registry=registry, **action_kwargs)
+
+        if success:
+            print_message('success', "✓ " + tool_name + success_suffix)
         else:
-            print_message('error', f"✗ Failed to {action_name} {tool_name}")
+            print_message('error', fail_prefix + tool_name)
         print()
 
-    completion_word = "installation" if action_name == "install" else "removal"
     print_message('success', f"MCP tool {completion_word} complete!")
 
 
-def cmd_add_interactive(_args, registry: MCPToolRegistry) -> None:
+def cmd_add_interactive(args, registry: "MCPToolRegistry") -> None:
     if not validate_interactive_environment():
         sys.exit(1)
 
-    tools = registry.list_tools()
-    available_tools = registry.get_available_tools()
+    tools, installed = registry.snapshot()
 
-    if not available_tools:
+    if not tools.keys() - installed:
         print_message('success', "All tools are already installed!")
         return
 
     selected_tools = _get_user_tool_selection(
-        tools, 
-        registry, 
+        tools,
+        installed,
+        registry,
         "Select MCP tools to install:",
-        lambda tool, reg: not tool.is_installed(registry=reg),
+        False,
         "Installation cancelled."
     )
     if not selected_tools:
         return
 
-    _process_tools(selected_tools, tools, registry, "install", lambda tool, **kwargs: tool.install(**kwargs))
+    _process_tools(selected_tools, tools, registry, "install", args.jobs)
 
 
-def cmd_remove_interactive(_args, registry: MCPToolRegistry) -> None:
+def cmd_remove_interactive(_args, registry: "MCPToolRegistry") -> None:
     if not validate_interactive_environment():
         sys.exit(1)
 
-    tools = registry.list_tools()
-    installed_tools = registry.get_installed_tools()
+    tools, installed = registry.snapshot()
 
-    if not installed_tools:
+    if not installed:
         print_message('info', "No tools are currently installed.")
         return
 
     selected_tools = _get_user_tool_selection(
-        tools, 
-        registry, 
+        tools,
+        installed,
+        registry,
         "Select MCP tools to remove:",
-        lambda tool, reg: tool.is_installed(registry=reg),
+        True,
         "Removal cancelled."
     )
     if not selected_tools:
         return
 
-    _process_tools(selected_tools, tools, registry, "remove", lambda tool, **kwargs: tool.remove(**kwargs))
+    _process_tools(selected_tools, tools, registry, "remove")
 
 
-def main():
+def _get_registry() -> "MCPToolRegistry":
+    from .tools import MCPToolRegistry
+
+    return MCPToolRegistry()
+
+
+def _configure_list_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--json', action='store_true',
+                        help='Print the tool list as JSON for scripts')
+
+
+def _configure_add_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('tools', nargs='*', help='Tool names to install')
+    parser.add_argument('--interactive', '-i', action='store_true',
+                        help='Interactive tool selection menu')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Install up to N tools at once (default: 1)')
+
+
+def _configure_remove_parser(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('tools', nargs='*', help='Tool names to remove')
+    parser.add_argument('--interactive', '-i', action='store_true',
+                        help='Interactive tool removal menu')
+
+
+_SUBCOMMANDS = {
+    'list': ('List available MCP tools', _configure_list_parser, cmd_list),
+    'add': ('Add MCP tools (use --interactive for guided selection)', _configure_add_parser, cmd_add),
+    'remove': ('Remove MCP tools (use --interactive for guided selection)', _configure_remove_parser, cmd_remove),
+}
+
+
+def _print_banner(parser: argparse.ArgumentParser) -> None:
+    print("Claude eXtend (cx) - MCP Server Manager")
+    print(f"Version {__version__}")
+    print()
+    parser.print_help()
+
+
+def _build_parser(argv: list) -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Claude eXtend (cx) - MCP Server Manager",
         prog="cx"
     )
     parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help='Ignore cached prerequisite lookups and rebuild them')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Serve commands from a background process for cx-client')
 
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
 
-    subparsers.add_parser('list', help='List available MCP tools')
+    # Only the chosen subcommand gets its arguments; the others are registered
+    # as bare stubs so top-level help and unknown-command errors still list them.
+    chosen = next((arg for arg in argv if not arg.startswith('-')), None)
+    if chosen not in _SUBCOMMANDS:
+        chosen = None
 
-    add_parser = subparsers.add_parser('add', help='Add MCP tools (use --interactive for guided selection)')
-    add_parser.add_argument('tools', nargs='*', help='Tool names to install')
-    add_parser.add_argument('--interactive', '-i', action='store_true',
-                            help='Interactive tool selection menu')
+    for name, (help_text, configure, handler) in _SUBCOMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.set_defaults(func=handler)
+        if chosen is None or name == chosen:
+            configure(subparser)
 
-    remove_parser = subparsers.add_parser('remove', help='Remove MCP tools (use --interactive for guided selection)')
-    remove_parser.add_argument('tools', nargs='*', help='Tool names to remove')
-    remove_parser.add_argument('--interactive', '-i', action='store_true',
-                              help='Interactive tool removal menu')
+    return parser
 
-    args = parser.parse_args()
 
-    registry = MCPToolRegistry()
+def main():
+    argv = sys.argv[1:]
+    parser = _build_parser(argv)
 
-    if args.command == 'list':
-        cmd_list(args, registry)
-    elif args.command == 'add':
-        cmd_add(args, registry)
-    elif args.command == 'remove':
-        cmd_remove(args, registry)
-    else:
-        print("Claude eXtend (cx) - MCP Server Manager")
-        print(f"Version {__version__}")
-        print()
-        parser.print_help()
+    args = parser.parse_args(argv)
+
+    if args.daemon:
+        from .daemon import serve
+
+        serve()
+        return
+
+    if not hasattr(args, 'func'):
+        _print_banner(parser)
+        return
+
+    args.func(args, _get_registry())
 
 
 if __name__ == '__main__':
@@ -1,11 +1,69 @@
 """MCP Tool Registry and Management."""
 
+import json
 import os
 import shutil
 import subprocess
-from typing import Dict, List, Optional
-
-from .utils import print_message
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, TypedDict
+
+from .utils import print_message, which_cached
+
+
+_PROJECT_DIR_PLACEHOLDER = '{project_dir}'
+# What `claude mcp add` reports on stderr when the server name is already configured.
+_ALREADY_EXISTS_MARKER = 'already exists'
+
+
+class ToolConfig(TypedDict):
+    description: str
+    command: str
+    args: List[str]
+
+
+def _validate_tool_configs(tool_configs: object) -> Dict[str, ToolConfig]:
+    # Check the whole document up front so a bad entry is reported by name
+    # instead of surfacing as a KeyError halfway through building the registry.
+    if not isinstance(tool_configs, dict):
+        raise ValueError("'tools' must map tool names to tool definitions")
+    for name, config in tool_configs.items():
+        if not isinstance(config, dict):
+            raise ValueError(f"tool '{name}' must be an object")
+        for field in ('description', 'command'):
+            if not isinstance(config.get(field), str):
+                raise ValueError(f"tool '{name}' needs a string '{field}'")
+        args = config.get('args')
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            raise ValueError(f"tool '{name}' needs 'args' as a list of strings")
+    return tool_configs
+
+
+def _read_configured_servers() -> Optional[FrozenSet[str]]:
+    # `claude mcp list` reports the servers in ~/.claude.json (user scope plus
+    # this directory's local scope) and ./.mcp.json (project scope). Reading the
+    # files directly avoids starting the Claude CLI; None means "ask the CLI".
+    if os.environ.get('CLAUDE_CONFIG_DIR'):
+        return None
+
+    try:
+        data = json.loads((Path.home() / '.claude.json').read_bytes())
+        project_data = json.loads(Path('.mcp.json').read_bytes()) if os.path.exists('.mcp.json') else {}
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(project_data, dict):
+        return None
+
+    projects = data.get('projects', {})
+    local = projects.get(os.getcwd(), {}) if isinstance(projects, dict) else None
+    if not isinstance(local, dict):
+        return None
+
+    sections = (data.get('mcpServers', {}), local.get('mcpServers', {}), project_data.get('mcpServers', {}))
+    if not all(isinstance(section, dict) for section in sections):
+        return None
+    return frozenset().union(*sections)
 
 
 class MCPTool:
@@ -15,36 +73,63 @@ class MCPTool:
         self.description = description
         self.command = command
         self.args = args
+        self._arg_has_placeholder = [_PROJECT_DIR_PLACEHOLDER in arg for arg in args]
 
     def check_prerequisites(self) -> bool:
-        return bool(shutil.which(self.command))
+        return bool(which_cached(self.command))
 
     def is_installed(self, registry) -> bool:
         return registry.is_tool_installed(self.name)
 
-    def _run_claude_command(self, command: List[str], action: str) -> bool:
+    def _report_result(self, success: bool, action: str, done: str) -> bool:
+        if success:
+            print_message('success', f"{self.name} {done}")
+        else:
+            print_message('error', f"Failed to {action} {self.name}")
+        return success
+
+    def _run_claude_command(self, command: List[str], action: str, done: str) -> bool:
         try:
             subprocess.run(command, check=True)
-            print_message('success', f"{self.name} {action}")
-            return True
+            return self._report_result(True, action, done)
         except subprocess.CalledProcessError:
-            print_message('error', f"Failed to {action} {self.name}")
-            return False
+            return self._report_result(False, action, done)
+
+    def _install_command(self, project_dir: str) -> List[str]:
+        processed_args = [
+            arg.replace(_PROJECT_DIR_PLACEHOLDER, project_dir) if has_placeholder else arg
+            for arg, has_placeholder in zip(self.args, self._arg_has_placeholder)
+        ]
+        return ['claude', 'mcp', 'add', self.name, '--', self.command] + processed_args
 
-    def install(self, registry, project_dir: str = None) -> bool:
+    def _finish_add(self, returncode: int, stderr: str) -> bool:
+        if returncode != 0 and _ALREADY_EXISTS_MARKER in stderr:
+            print_message('success', f"{self.name} is already installed")
+            return True
+        if returncode != 0 and stderr:
+            sys.stderr.write(stderr)
+        return self._report_result(returncode == 0, "install", "installed")
+
+    def install(self, registry, project_dir: str = None, skip_check: bool = False) -> bool:
         if project_dir is None:
             project_dir = os.getcwd()
 
-        if self.is_installed(registry=registry):
+        if not skip_check and self.is_installed(registry=registry):
             print_message('success', f"{self.name} is already installed")
             return True
 
         print_message('info', f"Installing {self.description}...")
 
-        processed_args = [arg.replace('{project_dir}', project_dir) for arg in self.args]
-
-        command = ['claude', 'mcp', 'add', self.name, '--', self.command] + processed_args
-        return self._run_claude_command(command, "installed")
+        command = self._install_command(project_dir)
+        if skip_check:
+            # Let `claude mcp add` detect duplicates instead of listing first.
+            result = subprocess.run(command, capture_output=True, text=True)
+            success = self._finish_add(result.returncode, result.stderr)
+        else:
+            success = self._run_claude_command(command, "install", "installed")
+        if success:
+            registry.set_installed(self.name, True)
+        return success
 
     def remove(self, registry) -> bool:
         if not self.is_installed(registry=registry):
@@ -54,7 +139,10 @@ class MCPTool:
         print_message('info', f"Removing {self.description}...")
 
         command = ['claude', 'mcp', 'remove', self.name]
-        return self._run_claude_command(command, "removed")
+        success = self._run_claude_command(command, "remove", "removed")
+        if success:
+            registry.set_installed(self.name, False)
+        return success
 
     def to_claude_desktop_format(self) -> dict:
         return {
@@ -66,8 +154,20 @@ class MCPTool:
 class MCPToolRegistry:
 
     def __init__(self):
-        self.tools = self._load_tools()
-        self._installed_tools_cache = None
+        self._tools: Optional[Dict[str, MCPTool]] = None
+        self._installed_names: Optional[FrozenSet[str]] = None
+        self._command_paths: Dict[str, Optional[str]] = {}
+
+    @property
+    def tools(self) -> Dict[str, MCPTool]:
+        # The config is read on first use, not when the registry is created.
+        if self._tools is None:
+            self._tools = self._load_tools()
+        return self._tools
+
+    @tools.setter
+    def tools(self, tools: Dict[str, MCPTool]) -> None:
+        self._tools = tools
 
     @staticmethod
     def _load_tools() -> Dict[str, MCPTool]:
@@ -76,21 +176,21 @@ class MCPToolRegistry:
         config_path = get_config_path()
         if config_path:
             try:
-                external_tools = load_external_tools_config(config_path)
+                external_tools = _validate_tool_configs(load_external_tools_config(config_path))
                 print_message('info', f"Loaded tools from config: {config_path}")
 
-                tools = {}
-                for tool_name, tool_config in external_tools.items():
-                    tools[tool_name] = MCPTool(
+                return {
+                    tool_name: MCPTool(
                         name=tool_name,
                         description=tool_config['description'],
                         command=tool_config['command'],
                         args=tool_config['args']
                     )
-                return tools
+                    for tool_name, tool_config in external_tools.items()
+                }
 
-            except Exception:
-                print_message('warning', f"Failed to load or parse external config at '{config_path}'.")
+            except Exception as e:
+                print_message('warning', f"Failed to load or parse external config at '{config_path}': {e}")
                 print_message('info', "Please ensure the file exists, is valid JSON, and has correct permissions.")
                 print_message('info', "Falling back to default tool registry")
 
@@ -125,21 +225,128 @@ class MCPToolRegistry:
 
         return tools
 
-    def _get_installed_tools_output(self) -> Optional[str]:
-        if self._installed_tools_cache is None:
-            try:
-                result = subprocess.run(['claude', 'mcp', 'list'], capture_output=True, text=True)
-                if result.returncode == 0:
-                    self._installed_tools_cache = result.stdout
-                else:
-                    self._installed_tools_cache = ""
-            except subprocess.SubprocessError:
-                self._installed_tools_cache = ""
-        return self._installed_tools_cache
+    @staticmethod
+    def _get_installed_tools_output() -> bytes:
+        try:
+            result = subprocess.run(['claude', 'mcp', 'list'], capture_output=True)
+        except subprocess.SubprocessError:
+            return b""
+        return result.stdout if result.returncode == 0 else b""
+
+    def _get_installed_names(self) -> FrozenSet[str]:
+        installed_names = self._installed_names
+        if installed_names is None:
+            installed_names = _read_configured_servers()
+            if installed_names is None:
+                # `claude mcp list` prints one "<name>: <command> ..." line per server.
+                # The listing stays as bytes; only the parsed names are decoded.
+                output = self._get_installed_tools_output()
+                installed_names = frozenset(
+                    line.split(b':', 1)[0].strip().decode('utf-8', 'replace')
+                    for line in output.splitlines() if b':' in line
+                )
+            self._installed_names = installed_names
+        return installed_names
+
+    def refresh(self) -> None:
+        self._installed_names = None
+
+    def set_installed(self, tool_name: str, installed: bool) -> None:
+        # Keep a listing that has already been read in step with our own
+        # changes, so the next tool in a batch doesn't list servers again.
+        installed_names = self._installed_names
+        if installed_names is not None:
+            self._installed_names = installed_names | {tool_name} if installed else installed_names - {tool_name}
 
     def is_tool_installed(self, tool_name: str) -> bool:
-        installed_output = self._get_installed_tools_output()
-        return f"{tool_name}:" in installed_output if installed_output else False
+        return tool_name in self._get_installed_names()
+
+    def get_prerequisite_status(self, names: Optional[Iterable[str]] = None, refresh: bool = False) -> Dict[str, bool]:
+        tools = self.tools
+        if names is None:
+            names = tools.keys()
+        commands = {name: tools[name].command for name in names if name in tools}
+
+        pending = {command for command in commands.values() if refresh or command not in self._command_paths}
+        if pending:
+            self._resolve_commands(pending, refresh)
+
+        return {name: self._command_paths[command] is not None for name, command in commands.items()}
+
+    def _resolve_commands(self, commands: Set[str], refresh: bool) -> None:
+        from . import __version__
+        from .cache import load_state, make_key, save_state
+
+        all_commands = sorted((name, tool.command) for name, tool in self.tools.items())
+        key = make_key(all_commands, __version__, sys.executable, os.environ.get('PATH', ''))
+        cached_paths = {} if refresh else (load_state(key) or {}).get('paths', {})
+
+        # Only resolved paths are cached, and each is re-verified with a single
+        # access() call. Missing commands are always looked up again so a newly
+        # installed prerequisite shows up without a cache refresh.
+        paths = dict(cached_paths)
+        for command in commands:
+            path = cached_paths.get(command)
+            if not (path and os.access(path, os.X_OK)):
+                path = shutil.which(command)
+            self._command_paths[command] = path
+            if path:
+                paths[command] = path
+            else:
+                paths.pop(command, None)
+
+        if paths != cached_paths:
+            save_state(key, {'paths': paths})
+
+    def install_many(self, names: Iterable[str], project_dir: Optional[str] = None, jobs: int = 1,
+                     skip_check: bool = False) -> Dict[str, bool]:
+        tools = [self.tools[name] for name in dict.fromkeys(names)]
+        if not tools:
+            return {}
+        if project_dir is None:
+            project_dir = os.getcwd()
+
+        results = {}
+        installed_names = frozenset() if skip_check else self._get_installed_names()
+        running: Deque[Tuple[MCPTool, subprocess.Popen]] = deque()
+
+        # Up to `jobs` `claude mcp add` children run at once; a new one starts
+        # as soon as the oldest has been collected.
+        for tool in tools:
+            if tool.name in installed_names:
+                print_message('success', f"{tool.name} is already installed")
+                results[tool.name] = True
+                continue
+
+            if running and len(running) >= jobs:
+                self._collect_install(*running.popleft(), results)
+            print_message('info', f"Installing {tool.description}...")
+            process = subprocess.Popen(tool._install_command(project_dir), stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.PIPE, text=True)
+            running.append((tool, process))
+
+        while running:
+            self._collect_install(*running.popleft(), results)
+
+        self.refresh()
+        if jobs > 1:
+            self._verify_installs(results)
+        return results
+
+    def _verify_installs(self, results: Dict[str, bool]) -> None:
+        # Concurrent `claude mcp add` runs each rewrite the same Claude config,
+        # so one can drop another's entry while both exit 0. Only a server that
+        # is listed afterwards counts as installed.
+        installed_names = self._get_installed_names()
+        for name, success in results.items():
+            if success and name not in installed_names:
+                print_message('error', f"{name} is missing from the Claude config after installing; run 'cx add {name}' again")
+                results[name] = False
+
+    @staticmethod
+    def _collect_install(tool: MCPTool, process: subprocess.Popen, results: Dict[str, bool]) -> None:
+        _, stderr = process.communicate()
+        results[tool.name] = tool._finish_add(process.returncode, stderr)
 
     def get_tool(self, name: str) -> Optional[MCPTool]:
         return self.tools.get(name)
@@ -150,8 +357,22 @@ class MCPToolRegistry:
     def get_tool_names(self) -> List[str]:
         return list(self.tools.keys())
 
+    def snapshot(self) -> Tuple[Dict[str, MCPTool], FrozenSet[str]]:
+        tools = self.tools
+        installed_names = self._get_installed_names()
+        return tools, frozenset(name for name in tools if name in installed_names)
+
+    def partition_tools(self) -> Tuple[List[str], List[str]]:
+        installed_names = self._get_installed_names()
+        installed, available = [], []
+        for name in self.tools:
+            (installed if name in installed_names else available).append(name)
+        return installed, available
+
     def get_installed_tools(self) -> List[str]:
-        return [name for name, tool in self.tools.items() if tool.is_installed(registry=self)]
+        installed_names = self._get_installed_names()
+        return [name for name in self.tools if name in installed_names]
 
     def get_available_tools(self) -> List[str]:
-        return [name for name, tool in self.tools.items() if not tool.is_installed(registry=self)]
+        installed_names = self._get_installed_names()
+        return [name for name in self.tools if name not in installed_names]
@@ -1,10 +1,11 @@
 """Utility functions for Claude eXtend."""
 
+import functools
 import os
 import shutil
 import sys
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 
 class Colors:
@@ -15,36 +16,61 @@ class Colors:
     NC = '\033[0m'
 
 
+_ICONS = {
+    'info': 'ℹ️',
+    'success': '✅',
+    'warning': '⚠️',
+    'error': '❌'
+}
+
+_COLORS = {
+    'info': Colors.BLUE,
+    'success': Colors.GREEN,
+    'warning': Colors.YELLOW,
+    'error': Colors.RED
+}
+
+# Full "<color><icon>  " prefix for each level, built once at import.
+_PREFIX = {level: f"{_COLORS[level]}{_ICONS[level]}  " for level in _ICONS}
+_DEFAULT_PREFIX = _PREFIX['info']
+_LINE_SUFFIX = Colors.NC + "\n"
+
+
+@functools.lru_cache(maxsize=64)
+def which_cached(command: str) -> Optional[str]:
+    # PATH doesn't change during a run, so each command is searched for once.
+    return shutil.which(command)
+
+
+def format_message(level: str, message: str) -> str:
+    return _PREFIX.get(level, _DEFAULT_PREFIX) + message + Colors.NC
+
+
 def print_message(level: str, message: str) -> None:
-    icons = {
-        'info': 'ℹ️',
-        'success': '✅',
-        'warning': '⚠️',
-        'error': '❌'
-    }
-    colors = {
-        'info': Colors.BLUE,
-        'success': Colors.GREEN,
-        'warning': Colors.YELLOW,
-        'error': Colors.RED
-    }
+    sys.stderr.write(_PREFIX.get(level, _DEFAULT_PREFIX) + message + _LINE_SUFFIX)
 
-    icon = icons.get(level, 'ℹ️')
-    color = colors.get(level, Colors.BLUE)
 
-    print(f"{color}{icon}  {message}{Colors.NC}", file=sys.stderr)
+_PROJECT_FILES = ('package.json', 'pyproject.toml', 'Cargo.toml', '.git', 'go.mod')
+_PROJECT_FILES_SET = frozenset(_PROJECT_FILES)
 
 
-def validate_environment() -> bool:
-    project_files = ['package.json', 'pyproject.toml', 'Cargo.toml', '.git', 'go.mod']
+def _has_project_file() -> bool:
+    # One directory read instead of a stat() per candidate name.
+    try:
+        with os.scandir('.') as entries:
+            return any(entry.name in _PROJECT_FILES_SET for entry in entries)
+    except OSError:
+        return any(map(os.path.exists, _PROJECT_FILES))
+
 
-    if not any(Path(f).exists() for f in project_files):
+def validate_environment() -> bool:
+    if not _has_project_file():
         print_message('warning', "No project directory detected")
         print_message('info', "Look for files like package.json, pyproject.toml, Cargo.toml, .git, or go.mod")
     else:
         print_message('success', f"Project directory detected: {os.getcwd()}")
 
-    if not shutil.which('claude'):
+    if not which_cached('claude'):
         print_message('error', "Claude CLI not found. Please install it first.")
         return False
 
@@ -62,30 +88,45 @@ def validate_interactive_environment() -> bool:
     return True
 
 
+@functools.lru_cache(maxsize=1)
+def _config_candidates() -> Tuple[Path, ...]:
+    home = Path.home()
+    return (
+        home / '.config' / 'claude-extend' / 'tools.json',
+        home / '.claude-extend' / 'tools.json',
+    )
+
+
 def get_config_path() -> Optional[Path]:
-    
     env_config = os.environ.get('CLAUDE_EXTEND_CONFIG')
     if env_config:
         config_path = Path(env_config)
         if config_path.exists():
             return config_path
-    
-    config_locations = [
-        Path.home() / '.config' / 'claude-extend' / 'tools.json',
-        Path.home() / '.claude-extend' / 'tools.json'
-    ]
-    
-    for config_path in config_locations:
+
+    for config_path in _config_candidates():
         if config_path.exists():
             return config_path
-    
+
     return None
 
 
+# Parsed configs keyed by path, reused while the file's mtime and size match.
+_CONFIG_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Dict[str, any]]]] = {}
+
+
 def load_external_tools_config(config_path: Path) -> Dict[str, Dict[str, any]]:
     import json
-    
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config_data = json.load(f)
-    
-    return config_data.get('tools', {})
+
+    stat = os.stat(config_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _CONFIG_CACHE.get(config_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    # json.loads detects UTF-8 from the raw bytes, skipping the text wrapper.
+    config_data = json.loads(Path(config_path).read_bytes())
+
+    tools = config_data.get('tools', {})
+    _CONFIG_CACHE[config_path] = (signature, tools)
+    return tools
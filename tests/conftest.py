@@ -1,8 +1,132 @@
 """Pytest configuration and fixtures."""
 
+import argparse
+import json
+from dataclasses import dataclass
+
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
+from claude_extend import main, tools
 from claude_extend.tools import MCPTool, MCPToolRegistry
+from claude_extend.utils import _config_candidates, which_cached
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "real_subprocess: allow the test to start real processes")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Run the in-memory tests first so --exitfirst fails fast; tests that read
+    # config files from disk or start real processes go last, in collected order.
+    items.sort(key=lambda item: 'ExternalConfig' in item.nodeid or 'real_subprocess' in item.keywords)
+
+
+@pytest.fixture(autouse=True)
+def block_real_subprocess(request, monkeypatch):
+    """Fail any test that starts a process it didn't mock, unless marked real_subprocess."""
+    if 'real_subprocess' in request.keywords:
+        return
+
+    def _unmocked_popen(args, *unused_args, **unused_kwargs):
+        raise RuntimeError(f"unmocked subprocess: {args!r}")
+
+    # subprocess.run goes through Popen, so this guards both
+    monkeypatch.setattr('subprocess.Popen', _unmocked_popen)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Point the on-disk cache at a per-test directory."""
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv('XDG_CACHE_HOME', str(cache_home))
+    return cache_home / "claude-extend"
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """Point HOME at an empty per-test directory so the real ~/.claude.json is never read."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.delenv('CLAUDE_CONFIG_DIR', raising=False)
+    return home
+
+
+@pytest.fixture(autouse=True)
+def clear_lookup_caches():
+    """Start every test with empty command and config location caches."""
+    which_cached.cache_clear()
+    _config_candidates.cache_clear()
+    yield
+    which_cached.cache_clear()
+    _config_candidates.cache_clear()
+
+
+@pytest.fixture
+def args():
+    """Parsed arguments with the defaults every subcommand handler reads."""
+    return argparse.Namespace(interactive=False, tools=[], jobs=1, json=False, refresh_cache=False)
+
+
+@pytest.fixture
+def mock_validate(monkeypatch):
+    """Make the CLI's environment check pass; set return_value = False to make it fail."""
+    mock = MagicMock(return_value=True)
+    monkeypatch.setattr(main, 'validate_environment', mock)
+    return mock
+
+
+@pytest.fixture
+def mock_checkbox():
+    """Mock questionary's checkbox prompt; the user cancels unless a test sets return_value.ask.return_value."""
+    with patch('questionary.checkbox') as mock:
+        mock.configure_mock(**{'return_value.ask.return_value': None})
+        yield mock
+
+
+@pytest.fixture
+def force_questionary_menu(monkeypatch):
+    """Route interactive selection through questionary regardless of tool count."""
+    monkeypatch.setattr('claude_extend.main._SIMPLE_MENU_MAX_TOOLS', 0)
+
+
+@dataclass
+class FakeTool:
+    """Plain stand-in for an MCPTool in tests that never assert on its calls."""
+    name: str = 'test-tool'
+    description: str = 'Test Tool'
+    command: str = 'echo'
+
+    def check_prerequisites(self) -> bool:
+        return True
+
+    def install(self, *args, **kwargs) -> bool:
+        return True
+
+    def remove(self, *args, **kwargs) -> bool:
+        return True
+
+
+@pytest.fixture
+def fake_tool():
+    """A FakeTool whose prerequisites are met and whose install and remove succeed."""
+    return FakeTool()
+
+
+@pytest.fixture
+def registry_with_tool(fake_tool):
+    """A registry stand-in offering only fake_tool, under the name test-tool."""
+    registry = MagicMock(spec_set=MCPToolRegistry)
+    registry.list_tools.return_value = {'test-tool': fake_tool}
+    return registry
+
+
+@pytest.fixture
+def unknown_tool_registry(fake_tool):
+    """A registry stand-in offering test-tool and other-tool, so any other name is unknown."""
+    registry = MagicMock(spec_set=MCPToolRegistry)
+    registry.list_tools.return_value = {'test-tool': fake_tool, 'other-tool': fake_tool}
+    return registry
 
 
 @pytest.fixture
@@ -16,6 +140,33 @@ def mock_tool():
     )
 
 
+@pytest.fixture(scope='session')
+def default_registry():
+    """Build one registry with only the built-in tools, shared by tests that just read them."""
+    registry = MCPToolRegistry()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('claude_extend.utils.get_config_path', lambda: None)
+        registry.tools  # Load while no external config can be found
+    return registry
+
+
+@pytest.fixture(scope='session')
+def custom_tools_config(tmp_path_factory):
+    """Write an external tools.json with one custom tool, once per session."""
+    # New format: the tool name comes from the key, with no name field
+    config_file = tmp_path_factory.mktemp('config') / 'tools.json'
+    config_file.write_text(json.dumps({
+        "tools": {
+            "custom-tool": {
+                "description": "Custom Tool - A custom MCP tool",
+                "command": "python",
+                "args": ["-m", "custom_tool"]
+            }
+        }
+    }))
+    return config_file
+
+
 @pytest.fixture
 def mock_registry(mock_claude_mcp_calls):
     """Create a mock registry with test tools."""
@@ -38,6 +189,17 @@ def mock_registry(mock_claude_mcp_calls):
     return registry
 
 
+@pytest.fixture
+def patch_registry(monkeypatch):
+    """Return a function that makes main() build the given registry."""
+    def _patch(registry):
+        factory = MagicMock(return_value=registry)
+        # Patch the imported module object rather than a dotted path string
+        monkeypatch.setattr(tools, 'MCPToolRegistry', factory)
+        return factory
+    return _patch
+
+
 @pytest.fixture
 def mock_shutil_which():
     """Mock shutil.which to control prerequisite checking."""
@@ -48,11 +210,20 @@ def mock_shutil_which():
 
 
 @pytest.fixture
-def mock_claude_mcp_calls():
+def mock_claude_popen():
+    """Mock claude mcp processes started with Popen by concurrent installs."""
+    with patch('subprocess.Popen') as mock_popen:
+        mock_popen.return_value.communicate.return_value = (None, "")
+        mock_popen.return_value.returncode = 0
+        yield mock_popen
+
+
+@pytest.fixture
+def mock_claude_mcp_calls(mock_claude_popen):
     """Mock all claude mcp subprocess calls to avoid requiring Claude CLI in tests."""
     with patch('subprocess.run') as mock_run:
         # Mock successful claude mcp list with no tools installed
         mock_run.return_value.returncode = 0
-        mock_run.return_value.stdout = ""
+        mock_run.return_value.stdout = b""
         mock_run.return_value.stderr = ""
         yield mock_run
\ No newline at end of file
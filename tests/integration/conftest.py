@@ -0,0 +1,58 @@
+"""Fixtures shared by the CLI integration tests."""
+
+import sys
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from claude_extend import main
+from claude_extend.tools import MCPTool, MCPToolRegistry
+
+
+@pytest.fixture
+def tool_mock():
+    """A tool whose prerequisites are met and whose install and remove succeed."""
+    # A plain Mock is enough here, and spec rejects misspelt MCPTool methods
+    tool = Mock(spec=MCPTool, description="Test Tool")
+    tool.check_prerequisites.return_value = True
+    tool.install.return_value = True
+    tool.remove.return_value = True
+    return tool
+
+
+@pytest.fixture
+def registry_mock(tool_mock):
+    """A registry offering only tool_mock, not yet installed."""
+    registry = MagicMock(spec_set=MCPToolRegistry)
+    registry.list_tools.return_value = {'test-tool': tool_mock}
+    registry.snapshot.return_value = ({'test-tool': tool_mock}, frozenset())
+    registry.get_installed_tools.return_value = []
+    registry.get_available_tools.return_value = ['test-tool']
+    return registry
+
+
+@pytest.fixture
+def cli_mocks(monkeypatch, patch_registry, registry_mock):
+    """Replace the registry class and environment checks that main() reaches."""
+    patch_registry(registry_mock)
+    monkeypatch.setattr(main, 'validate_environment', lambda: True)
+    monkeypatch.setattr(main, 'validate_interactive_environment', lambda: True)
+    return registry_mock
+
+
+@pytest.fixture
+def set_argv(monkeypatch):
+    """Return a function that sets the command line main() parses."""
+    return lambda *args: monkeypatch.setattr(sys, 'argv', list(args))
+
+
+@pytest.fixture
+def run_main():
+    """Return a function that runs main() and returns its exit code, 0 when it returns normally."""
+    def _run():
+        try:
+            main.main()
+        except SystemExit as e:
+            return e.code or 0
+        return 0
+    return _run
@@ -1,138 +1,111 @@
 """Integration tests for CLI commands."""
 
 import pytest
-import sys
-from unittest.mock import patch, MagicMock
 
-from claude_extend.main import main
+from claude_extend import tools
+from claude_extend.main import _build_parser, cmd_add, cmd_list, cmd_remove
 
 
 class TestCLIArguments:
     """Test CLI argument parsing."""
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx'])
-    def test_no_arguments_shows_help(self, mock_registry, capsys):
-        """Test that running cx with no arguments shows help."""
-        main()
+    @pytest.mark.parametrize("argv,expected", [
+        (['cx'], ['Claude eXtend (cx) - MCP Server Manager', 'Version 0.2.0', 'usage: cx']),
+        (['cx', '--version'], ['cx 0.2.0']),
+        (['cx', '--help'], ['usage: cx', 'List available MCP tools', 'Add MCP tools']),
+    ])
+    def test_argparse_output(self, cli_mocks, set_argv, run_main, capsys, argv, expected):
+        """Test the banner, --version and --help output without building a registry."""
+        set_argv(*argv)
+
+        assert run_main() == 0
         captured = capsys.readouterr()
 
-        assert 'Claude eXtend (cx) - MCP Server Manager' in captured.out
-        assert 'Version 0.2.0' in captured.out
-        assert 'usage: cx' in captured.out
+        for text in expected:
+            assert text in captured.out
+        tools.MCPToolRegistry.assert_not_called()
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', '--version'])
-    def test_version_argument(self, mock_registry, capsys):
-        """Test --version argument."""
-        with pytest.raises(SystemExit):
-            main()
-        captured = capsys.readouterr()
-        assert 'cx 0.2.0' in captured.out
+    @pytest.mark.parametrize("argv", [
+        ['add', 'test-tool', '--interactive'],
+        ['remove', '-i', 'test-tool'],
+    ])
+    def test_only_chosen_subparser_configured(self, argv):
+        """Test that the chosen subcommand parses its arguments while the others stay bare."""
+        parser = _build_parser(argv)
+        args = parser.parse_args(argv)
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', '--help'])
-    def test_help_argument(self, mock_registry, capsys):
-        """Test --help argument."""
+        assert args.command == argv[0]
+        assert args.tools == ['test-tool']
+        assert args.interactive is True
+
+        other = 'remove' if argv[0] == 'add' else 'add'
         with pytest.raises(SystemExit):
-            main()
-        captured = capsys.readouterr()
-        assert 'usage: cx' in captured.out
-        assert 'List available MCP tools' in captured.out
-        assert 'Add MCP tools' in captured.out
+            parser.parse_args([other, 'test-tool'])
+
+    @pytest.mark.parametrize("command,handler", [
+        ('list', cmd_list),
+        ('add', cmd_add),
+        ('remove', cmd_remove),
+    ])
+    def test_subcommand_handler_attached(self, command, handler):
+        """Test that each subcommand carries its handler via parser defaults."""
+        args = _build_parser([command]).parse_args([command])
+
+        assert args.func is handler
 
 
 class TestListCommandIntegration:
     """Test list command integration."""
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', 'list'])
-    def test_list_command_integration(self, mock_registry_class, capsys):
+    def test_list_command_integration(self, cli_mocks, set_argv, run_main, capsys):
         """Test list command through main CLI."""
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {
-            "test-tool": MagicMock(description="Test Tool")
-        }
-        mock_registry.get_installed_tools.return_value = []
-        mock_registry_class.return_value = mock_registry
-
-        main()
+        set_argv('cx', 'list')
+
+        assert run_main() == 0
         captured = capsys.readouterr()
 
         assert '🔧 Available MCP Tools' in captured.out
-        mock_registry.list_tools.assert_called_once()
-        mock_registry.get_installed_tools.assert_called_once()
+        cli_mocks.snapshot.assert_called_once()
+        cli_mocks.get_installed_tools.assert_not_called()
 
 
 class TestCLIIntegration:
     """Integration tests for the complete CLI."""
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', 'add', 'test-tool'])
-    @patch('claude_extend.main.validate_environment')
-    def test_add_command_integration(self, mock_validate, mock_registry_class, capsys):
+    def test_add_command_integration(self, cli_mocks, tool_mock, set_argv, run_main, capsys):
         """Test add command through main CLI."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_tool = MagicMock()
-        mock_tool.description = "Test Tool"
-        mock_tool.check_prerequisites.return_value = True
-        mock_tool.install.return_value = True
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
-        mock_registry_class.return_value = mock_registry
-
-        main()
+        set_argv('cx', 'add', 'test-tool')
+
+        assert run_main() == 0
         captured = capsys.readouterr()
 
         assert 'Processing: Test Tool' in captured.err
-        mock_tool.install.assert_called_once()
-
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', 'add', '--interactive'])
-    @patch('claude_extend.main.validate_interactive_environment')
-    @patch('questionary.checkbox')
-    def test_add_interactive_integration(self, mock_checkbox, mock_validate, mock_registry_class):
-        """Test interactive add command through main CLI."""
-        mock_validate.return_value = True
-        mock_checkbox.return_value.ask.return_value = None  # User cancelled
-        mock_registry = MagicMock()
-        mock_registry.get_available_tools.return_value = ['test-tool']
-        mock_registry.list_tools.return_value = {'test-tool': MagicMock()}
-        mock_registry_class.return_value = mock_registry
-
-        main()
+        tool_mock.install.assert_called_once()
+
+    @pytest.mark.usefixtures('force_questionary_menu')
+    def test_add_interactive_integration(self, cli_mocks, set_argv, run_main, mock_checkbox):
+        """Test interactive add command through main CLI when the user cancels the menu."""
+        set_argv('cx', 'add', '--interactive')
+
+        assert run_main() == 0
         mock_checkbox.assert_called_once()
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', 'remove', 'test-tool'])
-    @patch('claude_extend.main.validate_environment')
-    def test_remove_command_integration(self, mock_validate, mock_registry_class, capsys):
+    def test_remove_command_integration(self, cli_mocks, tool_mock, set_argv, run_main, capsys):
         """Test remove command through main CLI."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_tool = MagicMock()
-        mock_tool.description = "Test Tool"
-        mock_tool.remove.return_value = True
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
-        mock_registry_class.return_value = mock_registry
-
-        main()
+        set_argv('cx', 'remove', 'test-tool')
+
+        assert run_main() == 0
         captured = capsys.readouterr()
 
         assert 'Processing: Test Tool' in captured.err
-        mock_tool.remove.assert_called_once()
+        tool_mock.remove.assert_called_once()
 
-    @patch('claude_extend.main.MCPToolRegistry')
-    @patch('sys.argv', ['cx', 'remove', 'unknown-tool'])
-    @patch('claude_extend.main.validate_environment')
-    def test_remove_unknown_tool_integration(self, mock_validate, mock_registry_class, capsys):
+    def test_remove_unknown_tool_integration(self, cli_mocks, set_argv, run_main, capsys):
         """Test remove command with unknown tool through main CLI."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {}
-        mock_registry_class.return_value = mock_registry
+        set_argv('cx', 'remove', 'unknown-tool')
+        cli_mocks.list_tools.return_value = {}
 
-        main()
+        assert run_main() == 0
         captured = capsys.readouterr()
 
-        assert 'Unknown tool: unknown-tool' in captured.err
\ No newline at end of file
+        assert 'Unknown tool: unknown-tool' in captured.err
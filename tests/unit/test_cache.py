@@ -0,0 +1,53 @@
+"""Tests for the cache module."""
+
+from claude_extend.cache import get_cache_path, load_state, make_key, save_state
+
+
+class TestCachePath:
+    """Test cache file location."""
+
+    def test_get_cache_path_xdg(self, tmp_path, monkeypatch):
+        """Test cache path honours XDG_CACHE_HOME."""
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+        assert get_cache_path() == tmp_path / 'claude-extend' / 'state.json'
+
+    def test_get_cache_path_default(self, tmp_path, monkeypatch):
+        """Test cache path falls back to ~/.cache."""
+        monkeypatch.delenv('XDG_CACHE_HOME', raising=False)
+        monkeypatch.setattr('pathlib.Path.home', lambda: tmp_path)
+
+        assert get_cache_path() == tmp_path / '.cache' / 'claude-extend' / 'state.json'
+
+
+class TestCacheState:
+    """Test loading and saving cached state."""
+
+    def test_make_key_is_stable(self):
+        """Test equal inputs produce equal keys and different inputs differ."""
+        assert make_key(['a', 'b'], '0.2.0') == make_key(['a', 'b'], '0.2.0')
+        assert make_key(['a', 'b'], '0.2.0') != make_key(['a', 'b'], '0.3.0')
+
+    def test_round_trip(self):
+        """Test saved state is returned for the same key."""
+        save_state('key-1', {'paths': {'echo': '/bin/echo'}})
+
+        assert load_state('key-1') == {'paths': {'echo': '/bin/echo'}}
+
+    def test_key_mismatch(self):
+        """Test state saved under another key is ignored."""
+        save_state('key-1', {'paths': {}})
+
+        assert load_state('key-2') is None
+
+    def test_missing_cache(self):
+        """Test loading with no cache file."""
+        assert load_state('key-1') is None
+
+    def test_corrupt_cache(self):
+        """Test a corrupt cache file is ignored."""
+        cache_path = get_cache_path()
+        cache_path.parent.mkdir(parents=True)
+        cache_path.write_text('not json{')
+
+        assert load_state('key-1') is None
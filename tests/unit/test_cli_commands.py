@@ -1,326 +1,401 @@
 """Unit tests for CLI command functions."""
 
-from unittest.mock import patch, MagicMock
+import json
+import subprocess
+import sys
+from contextlib import nullcontext
+from unittest.mock import DEFAULT, patch, MagicMock, Mock
 
 import pytest
+from claude_extend import main as main_module
 from claude_extend.main import (
     cmd_list, cmd_add, cmd_remove, cmd_remove_interactive,
-    _get_user_tool_selection, _process_tools
+    _get_user_tool_selection, _parse_selection, _process_tools
+)
+from claude_extend.tools import MCPToolRegistry
+
+_LIST_EXPECTED = (
+    '🔧 Available MCP Tools',
+    'Test Tool - A tool for testing',
+    'Another Tool - Another testing tool',
+    'Total: 2 tools',
 )
 
 
 class TestListCommand:
     """Test the list command."""
 
-    def test_cmd_list_with_tools(self, mock_registry, capsys):
+    def test_cmd_list_with_tools(self, mock_registry, capsys, args):
         """Test list command with available tools."""
-        args = MagicMock()
-
         cmd_list(args, mock_registry)
         captured = capsys.readouterr()
 
-        assert '🔧 Available MCP Tools' in captured.out
-        assert 'Test Tool - A tool for testing' in captured.out
-        assert 'Another Tool - Another testing tool' in captured.out
-        assert 'Total: 2 tools' in captured.out
-
+        missing = [text for text in _LIST_EXPECTED if text not in captured.out]
+        assert not missing, missing
 
-class TestAddCommand:
-    """Test the add command."""
+    def test_cmd_list_prerequisites_missing(self, mock_registry, mock_shutil_which, capsys, args):
+        """Test missing prerequisites are reported on stderr, keeping stdout free of color codes."""
+        mock_shutil_which.return_value = None
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_add_no_tools_specified(self, mock_validate, mock_registry, capsys):
-        """Test add command with no tools specified."""
-        args = MagicMock()
-        args.interactive = False
-        args.tools = []
+        cmd_list(args, mock_registry)
+        captured = capsys.readouterr()
 
-        cmd_add(args, mock_registry)
+        assert 'Test Tool - A tool for testing' in captured.out
+        assert 'Prerequisites missing' not in captured.out
+        assert '\x1b[' not in captured.out
+        assert 'test-tool: Prerequisites missing: echo not found' in captured.err
+
+    def test_cmd_list_json(self, mock_registry, mock_shutil_which, capsys, args):
+        """Test --json prints one machine-readable document without the pretty listing."""
+        mock_shutil_which.side_effect = {'echo': '/usr/bin/echo'}.get
+        mock_registry.tools['another-tool'].command = 'missing'
+        args.json = True
+
+        with patch.object(mock_registry, '_get_installed_tools_output', return_value=b"test-tool: echo\n"):
+            cmd_list(args, mock_registry)
         captured = capsys.readouterr()
 
-        assert 'No tools specified' in captured.err
-        mock_validate.assert_not_called()
+        assert '🔧' not in captured.out
+        assert json.loads(captured.out) == [
+            {'name': 'test-tool', 'description': 'Test Tool - A tool for testing', 'command': 'echo',
+             'installed': True, 'prereq_ok': True},
+            {'name': 'another-tool', 'description': 'Another Tool - Another testing tool', 'command': 'missing',
+             'installed': False, 'prereq_ok': False},
+        ]
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_add_valid_tool_success(self, mock_validate, capsys):
-        """Test successful tool installation."""
-        mock_validate.return_value = True
-        args = MagicMock()
-        args.interactive = False
-        args.tools = ['test-tool']
 
-        # Mock tool installation success
-        mock_tool = MagicMock()
-        mock_tool.check_prerequisites.return_value = True
-        mock_tool.install.return_value = True
-        mock_tool.description = "Test Tool"
+class TestAddCommand:
+    """Test the add command."""
 
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
+    def test_cmd_add_named_tool_skips_registry_scans(self, mock_validate, mock_registry, mock_shutil_which,
+                                                     mock_claude_mcp_calls, args):
+        """Test adding one named tool only resolves that tool and never scans the whole registry."""
+        mock_registry.tools['another-tool'].command = 'npx'
+        args.tools = ['test-tool']
 
-        cmd_add(args, mock_registry)
-        captured = capsys.readouterr()
+        with patch.object(mock_registry, 'snapshot') as mock_snapshot, \
+                patch.object(mock_registry, 'get_installed_tools') as mock_get_installed:
+            cmd_add(args, mock_registry)
 
-        assert 'Processing: Test Tool' in captured.err
-        assert '✓ test-tool installed successfully' in captured.err
-        mock_tool.install.assert_called_once()
+        mock_shutil_which.assert_called_once_with('echo')
+        mock_snapshot.assert_not_called()
+        mock_get_installed.assert_not_called()
+        commands = [c.args[0] for c in mock_claude_mcp_calls.call_args_list]
+        assert commands == [
+            ['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'test-tool'],
+        ]
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_add_prerequisites_missing(self, mock_validate, capsys):
+    def test_cmd_add_prerequisites_missing(self, mock_validate, capsys, args, fake_tool, registry_with_tool):
         """Test tool installation with missing prerequisites."""
-        mock_validate.return_value = True
-        args = MagicMock()
-        args.interactive = False
         args.tools = ['test-tool']
 
         # Mock missing prerequisites
-        mock_tool = MagicMock()
-        mock_tool.check_prerequisites.return_value = False
-        mock_tool.command = "python"
-        mock_tool.description = "Test Tool"
-
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
+        fake_tool.command = "python"
+        fake_tool.install = Mock()
+        registry_with_tool.get_prerequisite_status.return_value = {'test-tool': False}
 
-        cmd_add(args, mock_registry)
+        cmd_add(args, registry_with_tool)
         captured = capsys.readouterr()
 
         assert 'Prerequisites not met' in captured.err
         assert 'python not found' in captured.err
-        mock_tool.install.assert_not_called()
-
-
-class TestRemoveCommand:
-    """Test cmd_remove function."""
+        fake_tool.install.assert_not_called()
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_remove_no_tools_specified(self, mock_validate, capsys):
-        """Test remove command with no tools specified."""
-        mock_validate.return_value = True
-        args = MagicMock()
-        args.tools = []
-        args.interactive = False
-
-        mock_registry = MagicMock()
-
-        cmd_remove(args, mock_registry)
-        captured = capsys.readouterr()
-
-        assert 'No tools specified. Use --interactive or specify tool names to remove.' in captured.err
+    def test_cmd_add_with_jobs(self, mock_validate, mock_registry, mock_shutil_which, mock_claude_mcp_calls, capsys,
+                               args):
+        """Test --jobs installs runnable tools through install_many and reports each result in order."""
+        mock_claude_mcp_calls.return_value.stdout = b"test-tool: echo\nanother-tool: echo\n"
+        args.jobs = 4
+        args.tools = ['another-tool', 'unknown-tool', 'test-tool']
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_remove_valid_tool_success(self, mock_validate, capsys):
-        """Test successful tool removal."""
-        mock_validate.return_value = True
-        args = MagicMock()
-        args.tools = ['test-tool']
-        args.interactive = False
-
-        # Mock tool removal success
-        mock_tool = MagicMock()
-        mock_tool.remove.return_value = True
-        mock_tool.description = "Test Tool"
-
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
-
-        cmd_remove(args, mock_registry)
+        with patch.object(mock_registry, 'install_many', wraps=mock_registry.install_many) as mock_install_many:
+            cmd_add(args, mock_registry)
         captured = capsys.readouterr()
 
-        assert 'Processing: Test Tool' in captured.err
-        assert '✓ test-tool removed successfully' in captured.err
-        mock_tool.remove.assert_called_once()
+        mock_install_many.assert_called_once_with(['another-tool', 'test-tool'], jobs=4, skip_check=True)
+        assert 'Unknown tool: unknown-tool' in captured.err
+        assert captured.err.index('✓ another-tool installed') < captured.err.index('✓ test-tool installed')
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_remove_tool_failure(self, mock_validate, capsys):
-        """Test failed tool removal."""
-        mock_validate.return_value = True
-        args = MagicMock()
-        args.tools = ['test-tool']
-        args.interactive = False
 
-        # Mock tool removal failure
-        mock_tool = MagicMock()
-        mock_tool.remove.return_value = False
-        mock_tool.description = "Test Tool"
+class TestRemoveCommand:
+    """Test the remove command."""
 
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
+    def test_cmd_remove_lists_servers_once(self, mock_validate, mock_registry, mock_claude_mcp_calls, args):
+        """Test removing several tools runs `claude mcp list` once for the whole batch."""
+        mock_claude_mcp_calls.return_value.stdout = b"test-tool: echo\nanother-tool: echo\n"
+        args.tools = ['test-tool', 'another-tool']
 
         cmd_remove(args, mock_registry)
-        captured = capsys.readouterr()
 
-        assert 'Processing: Test Tool' in captured.err
-        assert '✗ Failed to remove test-tool' in captured.err
-        mock_tool.remove.assert_called_once()
+        commands = [c.args[0] for c in mock_claude_mcp_calls.call_args_list]
+        assert commands == [
+            ['claude', 'mcp', 'list'],
+            ['claude', 'mcp', 'remove', 'test-tool'],
+            ['claude', 'mcp', 'remove', 'another-tool'],
+        ]
+        assert mock_registry.get_installed_tools() == []
 
 
 class TestAddInteractiveCommand:
     """Test the interactive add command."""
 
-    @patch('claude_extend.main.validate_interactive_environment')
-    def test_cmd_add_interactive_environment_fail(self, mock_validate, mock_registry):
-        """Test interactive command when environment validation fails."""
-        mock_validate.return_value = False
-        args = MagicMock()
+    @pytest.mark.parametrize("env_ok,installed,raises,message,prompted", [
+        pytest.param(False, frozenset(), pytest.raises(SystemExit, match='1'), '', False, id="environment-fail"),
+        pytest.param(True, frozenset({'test-tool'}), nullcontext(), 'All tools are already installed!', False,
+                     id="all-installed"),
+        pytest.param(True, frozenset(), nullcontext(), '', True, id="quit"),
+    ])
+    @pytest.mark.usefixtures('force_questionary_menu')
+    def test_cmd_add_interactive_outcome(self, mock_checkbox, fake_tool, args, capsys, env_ok, installed, raises,
+                                         message, prompted):
+        """Test interactive add exits on a bad environment, stops when all is installed, and otherwise prompts."""
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.snapshot.return_value = ({'test-tool': fake_tool}, installed)
         args.interactive = True
 
-        with pytest.raises(SystemExit):
+        with patch.object(main_module, 'validate_interactive_environment', return_value=env_ok), raises:
             cmd_add(args, mock_registry)
-
-    @patch('claude_extend.main.validate_interactive_environment')
-    def test_cmd_add_interactive_all_installed(self, mock_validate, capsys):
-        """Test interactive command when all tools are already installed."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_registry.get_available_tools.return_value = []
-        args = MagicMock()
-        args.interactive = True
-
-        cmd_add(args, mock_registry)
         captured = capsys.readouterr()
 
-        assert 'All tools are already installed!' in captured.err
-
-    @patch('claude_extend.main.validate_interactive_environment')
-    @patch('questionary.checkbox')
-    def test_cmd_add_interactive_quit(self, mock_checkbox, mock_validate):
-        """Test interactive command with quit selection."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_registry.get_available_tools.return_value = ['test-tool']
-        mock_registry.list_tools.return_value = {'test-tool': MagicMock()}
-        mock_checkbox.return_value.ask.return_value = None  # User cancelled/quit
-        args = MagicMock()
-        args.interactive = True
-
-        cmd_add(args, mock_registry)
-        mock_checkbox.assert_called_once()
+        assert message in captured.err
+        assert mock_checkbox.call_count == (1 if prompted else 0)
 
-    @patch('claude_extend.main.validate_interactive_environment')
-    @patch('claude_extend.main._process_tools')
-    @patch('questionary.checkbox')
-    def test_cmd_add_interactive_with_prerequisites_missing(self, mock_checkbox, mock_install_tools, mock_validate):
+    @pytest.mark.usefixtures('force_questionary_menu')
+    def test_cmd_add_interactive_with_prerequisites_missing(self, mock_checkbox, fake_tool, args):
         """Test interactive add command with tool selection that has missing prerequisites."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
 
         # Create a tool with missing prerequisites
-        mock_tool = MagicMock()
-        mock_tool.is_installed.return_value = False
-        mock_tool.check_prerequisites.return_value = False
-        mock_tool.description = "Tool with missing prereqs"
-
-        mock_registry.get_available_tools.return_value = ['prereq-missing-tool']
-        mock_registry.list_tools.return_value = {'prereq-missing-tool': mock_tool}
-        mock_checkbox.return_value.ask.return_value = ['prereq-missing-tool']
-        args = MagicMock()
+        fake_tool.name = 'prereq-missing-tool'
+        fake_tool.description = "Tool with missing prereqs"
+
+        mock_registry.snapshot.return_value = ({'prereq-missing-tool': fake_tool}, frozenset())
+        mock_registry.get_prerequisite_status.return_value = {'prereq-missing-tool': False}
         args.interactive = True
 
-        cmd_add(args, mock_registry)
+        with patch.multiple(main_module, validate_interactive_environment=DEFAULT, _process_tools=DEFAULT) as mocks:
+            mocks['validate_interactive_environment'].return_value = True
+            mock_checkbox.return_value.ask.return_value = ['prereq-missing-tool']
+            cmd_add(args, mock_registry)
 
         # Verify the tool was selected and passed to install function
         mock_checkbox.assert_called_once()
         # Verify _process_tools was called with the correct parameters
-        mock_install_tools.assert_called_once()
+        mocks['_process_tools'].assert_called_once()
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_remove_interactive_flag(self, mock_validate):
+    def test_cmd_remove_interactive_flag(self, mock_validate, args):
         """Test that remove command routes to interactive when --interactive flag is used."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        args = MagicMock()
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
         args.interactive = True
-        args.tools = []
 
-        with patch('claude_extend.main.cmd_remove_interactive') as mock_interactive:
+        with patch.object(main_module, 'cmd_remove_interactive') as mock_interactive:
             cmd_remove(args, mock_registry)
             mock_interactive.assert_called_once_with(args, mock_registry)
 
-    @patch('claude_extend.main.validate_environment')
-    def test_cmd_remove_no_interactive_no_tools(self, mock_validate, capsys):
-        """Test remove command with no tools and no interactive flag."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        args = MagicMock()
-        args.interactive = False
-        args.tools = []
-
-        cmd_remove(args, mock_registry)
-        captured = capsys.readouterr()
-
-        assert 'No tools specified. Use --interactive or specify tool names to remove.' in captured.err
-
-    @patch('claude_extend.main.validate_interactive_environment')
-    def test_cmd_remove_interactive_no_tools_installed(self, mock_validate, capsys):
+    @patch.object(main_module, 'validate_interactive_environment')
+    def test_cmd_remove_interactive_no_tools_installed(self, mock_validate, capsys, fake_tool, args):
         """Test interactive remove with no tools installed."""
         mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {'test-tool': MagicMock()}
-        mock_registry.get_installed_tools.return_value = []
-        args = MagicMock()
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.snapshot.return_value = ({'test-tool': fake_tool}, frozenset())
 
         cmd_remove_interactive(args, mock_registry)
         captured = capsys.readouterr()
 
         assert 'No tools are currently installed.' in captured.err
 
-    @patch('claude_extend.main.validate_interactive_environment')
-    @patch('questionary.checkbox')
-    def test_cmd_remove_interactive_quit(self, mock_checkbox, mock_validate):
+    @pytest.mark.usefixtures('force_questionary_menu')
+    @patch.object(main_module, 'validate_interactive_environment')
+    def test_cmd_remove_interactive_quit(self, mock_validate, mock_checkbox, fake_tool, args):
         """Test interactive remove command with quit selection."""
         mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_registry.list_tools.return_value = {'test-tool': MagicMock()}
-        mock_checkbox.return_value.ask.return_value = None  # User cancelled/quit
-        args = MagicMock()
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.snapshot.return_value = ({'test-tool': fake_tool}, frozenset({'test-tool'}))
 
         cmd_remove_interactive(args, mock_registry)
         mock_checkbox.assert_called_once()
 
-    @patch('claude_extend.main.validate_interactive_environment')
-    @patch('claude_extend.main._process_tools')
-    @patch('questionary.checkbox')
-    def test_cmd_remove_interactive_with_selection(self, mock_checkbox, mock_process_tools, mock_validate):
+    @pytest.mark.usefixtures('force_questionary_menu')
+    def test_cmd_remove_interactive_with_selection(self, mock_checkbox, fake_tool, args):
         """Test interactive remove command with tool selection."""
-        mock_validate.return_value = True
-        mock_registry = MagicMock()
-        mock_tool = MagicMock()
-        mock_tool.is_installed.return_value = True
-        mock_registry.list_tools.return_value = {'test-tool': mock_tool}
-        mock_registry.get_installed_tools.return_value = ['test-tool']
-        mock_checkbox.return_value.ask.return_value = ['test-tool']
-        args = MagicMock()
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.snapshot.return_value = ({'test-tool': fake_tool}, frozenset({'test-tool'}))
 
-        cmd_remove_interactive(args, mock_registry)
+        with patch.multiple(main_module, validate_interactive_environment=DEFAULT, _process_tools=DEFAULT) as mocks:
+            mocks['validate_interactive_environment'].return_value = True
+            mock_checkbox.return_value.ask.return_value = ['test-tool']
+            cmd_remove_interactive(args, mock_registry)
 
         mock_checkbox.assert_called_once()
-        mock_process_tools.assert_called_once()
+        mocks['_process_tools'].assert_called_once()
 
     # Tests for removed functions have been removed since the functions were consolidated
 
 
-class TestCommandUnknownTools:
-    """Parameterized tests for unknown tool handling across commands."""
+class TestGetUserToolSelection:
+    """Test the shared interactive selection helper."""
+
+    @pytest.mark.usefixtures('force_questionary_menu')
+    def test_selection_filtered_by_installed_set(self, mock_checkbox, capsys):
+        """Test selections are filtered against the installed set without probing the tools."""
+        installed_tool = MagicMock(description="Installed")
+        available_tool = MagicMock(description="Available")
+        tools = {'installed-tool': installed_tool, 'available-tool': available_tool}
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.get_prerequisite_status.return_value = {'installed-tool': True, 'available-tool': True}
+        mock_checkbox.return_value.ask.return_value = ['installed-tool', 'available-tool']
 
-    @pytest.mark.parametrize("cmd_func,command_name", [
-        (cmd_add, "add"),
-        (cmd_remove, "remove"),
+        selected = _get_user_tool_selection(
+            tools, frozenset({'installed-tool'}), mock_registry, "Select MCP tools to install:", False
+        )
+        captured = capsys.readouterr()
+
+        assert selected == ['available-tool']
+        assert 'installed-tool is already installed, skipping.' in captured.err
+        installed_tool.is_installed.assert_not_called()
+        available_tool.is_installed.assert_not_called()
+        installed_tool.check_prerequisites.assert_not_called()
+
+    @pytest.mark.usefixtures('force_questionary_menu')
+    def test_selection_shows_status_indicators(self, mock_checkbox, fake_tool):
+        """Test each checkbox choice is labelled with its tool's installed and prerequisite status."""
+        tools = {'installed-tool': fake_tool, 'not-installed-tool': fake_tool, 'missing-prereq-tool': fake_tool}
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.get_prerequisite_status.return_value = {
+            'installed-tool': True, 'not-installed-tool': True, 'missing-prereq-tool': False
+        }
+
+        _get_user_tool_selection(
+            tools, frozenset({'installed-tool'}), mock_registry, "Select MCP tools to remove:", True
+        )
+
+        by_value = {choice.value: choice.title for choice in mock_checkbox.call_args.kwargs['choices']}
+        assert by_value == {
+            'installed-tool': 'installed-tool - Test Tool (already installed)',
+            'not-installed-tool': 'not-installed-tool - Test Tool (not installed)',
+            'missing-prereq-tool': 'missing-prereq-tool - Test Tool ⚠️  (prerequisites missing)',
+        }
+
+    def test_numbered_menu_for_small_registries(self, monkeypatch, capsys, fake_tool, mock_checkbox):
+        """Test small registries use the numbered menu without prompting through questionary."""
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.get_prerequisite_status.return_value = {'test-tool': True}
+        monkeypatch.setattr('builtins.input', lambda: '1')
+
+        selected = _get_user_tool_selection(
+            {'test-tool': fake_tool}, frozenset(), mock_registry, "Select MCP tools to install:", False
+        )
+        captured = capsys.readouterr()
+
+        assert selected == ['test-tool']
+        assert '  1) test-tool - Test Tool' in captured.err
+        mock_checkbox.assert_not_called()
+
+    def test_numbered_menu_reprompts_on_invalid_input(self, monkeypatch, capsys, fake_tool):
+        """Test an invalid entry shows an error and the menu again, and 'q' cancels."""
+        mock_registry = MagicMock(spec_set=MCPToolRegistry)
+        mock_registry.get_prerequisite_status.return_value = {'test-tool': True}
+        answers = iter(['7', 'q'])
+        monkeypatch.setattr('builtins.input', lambda: next(answers))
+
+        selected = _get_user_tool_selection(
+            {'test-tool': fake_tool}, frozenset(), mock_registry, "Select MCP tools to install:", False,
+            "Installation cancelled."
+        )
+        captured = capsys.readouterr()
+
+        assert selected == []
+        assert "Invalid selection: '7'" in captured.err
+        assert captured.err.count('  q) Quit') == 2
+        assert 'Installation cancelled.' in captured.err
+
+
+class TestParseSelection:
+    """Test parsing of numbered menu input."""
+
+    @pytest.mark.parametrize("selection,expected", [
+        ('1', ['one']),
+        ('3, 1', ['three', 'one']),
+        ('2,2', ['two']),
+        ('a', ['one', 'two', 'three']),
+        ('0', None),
+        ('4', None),
+        ('1,x', None),
+        ('1x', None),
+        ('', None),
     ])
-    @patch('claude_extend.main.validate_environment')
-    def test_unknown_tool_handling(self, mock_validate, cmd_func, command_name, capsys):
-        """Test unknown tool handling for both add and remove commands."""
-        mock_validate.return_value = True
-        args = MagicMock()
-        args.interactive = False
-        args.tools = ['unknown-tool']
+    def test_parse_selection(self, selection, expected):
+        """Test valid and invalid selections."""
+        assert _parse_selection(selection, ['one', 'two', 'three']) == expected
+
+    def test_parse_selection_reports_bad_fragments(self, capsys):
+        """Test every unusable fragment is named in the error."""
+        assert _parse_selection('1, x, 9', ['one', 'two']) is None
+        captured = capsys.readouterr()
+
+        assert "Invalid selection: 'x, 9'" in captured.err
+
+
+class TestCommandResults:
+    """Parameterized tests for reporting install and remove results across commands."""
+
+    @pytest.mark.parametrize("cmd_func,action,succeeded,expected", [
+        (cmd_add, "install", True, '✓ test-tool installed successfully'),
+        (cmd_add, "install", False, '✗ Failed to install test-tool'),
+        (cmd_remove, "remove", True, '✓ test-tool removed successfully'),
+        (cmd_remove, "remove", False, '✗ Failed to remove test-tool'),
+    ])
+    def test_known_tool_result(self, mock_validate, cmd_func, action, succeeded, expected, capsys, args, fake_tool,
+                               registry_with_tool):
+        """Test a known tool is processed once and its success or failure is reported."""
+        args.tools = ['test-tool']
+        setattr(fake_tool, action, Mock(return_value=succeeded))
+
+        cmd_func(args, registry_with_tool)
+        captured = capsys.readouterr()
 
-        mock_registry = MagicMock()
-        mock_registry.get_tool.return_value = None
-        mock_registry.list_tools.return_value = {'test-tool': MagicMock(), 'other-tool': MagicMock()}
+        assert 'Processing: Test Tool' in captured.err
+        assert expected in captured.err
+        getattr(fake_tool, action).assert_called_once()
+        assert getattr(fake_tool, action).call_args.kwargs['registry'] is registry_with_tool
+
+
+class TestCommandErrors:
+    """Parameterized tests for add and remove error paths."""
+
+    @pytest.mark.parametrize("cmd_func,tools,expected", [
+        pytest.param(cmd_add, [], ["No tools specified. Use --interactive or specify tool names."],
+                     id="add-no-tools"),
+        pytest.param(cmd_remove, [], ["No tools specified. Use --interactive or specify tool names to remove."],
+                     id="remove-no-tools"),
+        pytest.param(cmd_add, ['unknown-tool'],
+                     ["Unknown tool: unknown-tool", "Available tools: test-tool, other-tool"],
+                     id="add-unknown"),
+        pytest.param(cmd_remove, ['unknown-tool'],
+                     ["Unknown tool: unknown-tool", "Available tools: test-tool, other-tool"],
+                     id="remove-unknown"),
+    ])
+    def test_command_error(self, mock_validate, cmd_func, tools, expected, capsys, args, unknown_tool_registry):
+        """Test missing and unknown tool names are reported, validating the environment only when there are names."""
+        args.tools = tools
 
-        cmd_func(args, mock_registry)
+        cmd_func(args, unknown_tool_registry)
         captured = capsys.readouterr()
 
-        assert 'Unknown tool: unknown-tool' in captured.err
-        assert 'Available tools: test-tool, other-tool' in captured.err
+        for text in expected:
+            assert text in captured.err
+        assert mock_validate.call_count == (1 if tools else 0)
+
+
+class TestStartupImports:
+    """Guard the modules that importing the CLI pulls in."""
+
+    @pytest.mark.real_subprocess
+    def test_import_main_defers_heavy_modules(self):
+        """Test importing claude_extend.main leaves the registry, questionary and subprocess unloaded."""
+        deferred = ['claude_extend.tools', 'questionary', 'subprocess']
+        code = f"import sys, claude_extend.main; print([m for m in {deferred!r} if m in sys.modules])"
+
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == '[]'
@@ -0,0 +1,209 @@
+"""Unit tests for the optional cx daemon."""
+
+import json
+import os
+import select
+import socket
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from claude_extend import __version__, daemon, utils
+from claude_extend.daemon import forward, get_socket_path
+
+_SERVE = 'import sys; from claude_extend.daemon import serve; serve(sys.argv[1])'
+
+# Stands in for an interactive shell: a session leader on the pty that starts
+# the daemon as a background job and runs cx-client in the foreground.
+_TERMINAL_SESSION = """
+import fcntl, os, subprocess, sys, termios, time
+from claude_extend.daemon import forward
+
+fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+socket_path = sys.argv[1]
+daemon = subprocess.Popen([sys.executable, '-c', sys.argv[2], socket_path], preexec_fn=os.setpgrp)
+try:
+    while not os.path.exists(socket_path):
+        time.sleep(0.05)
+    code = forward(['add', '--interactive'], socket_path)
+finally:
+    daemon.terminate()
+    daemon.wait()
+sys.exit(code)
+"""
+
+
+def _wait_for_socket(socket_path):
+    deadline = time.monotonic() + 10
+    while not socket_path.exists():
+        if time.monotonic() > deadline:
+            pytest.fail("daemon did not start")
+        time.sleep(0.05)
+
+
+def _read_until(fd, marker, timeout=10):
+    output = b''
+    deadline = time.monotonic() + timeout
+    while marker not in output:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            pytest.fail(f"timed out waiting for {marker!r}; got {output!r}")
+        try:
+            chunk = os.read(fd, 4096)
+        except OSError:
+            chunk = b''
+        if not chunk:
+            pytest.fail(f"terminal closed before {marker!r}; got {output!r}")
+        output += chunk
+    return output
+
+
+class TestSocketPath:
+    """Test daemon socket location."""
+
+    def test_socket_path_uses_xdg_runtime_dir(self, tmp_path, monkeypatch):
+        """Test the socket lives in XDG_RUNTIME_DIR when it is set."""
+        monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+
+        assert get_socket_path() == tmp_path / 'claude-extend.sock'
+
+    def test_socket_path_falls_back_to_tempdir(self, monkeypatch):
+        """Test the socket falls back to a per-user directory in the temp directory."""
+        monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+
+        assert get_socket_path().parent.name == f'claude-extend-{os.getuid()}'
+
+
+class TestWarmConfigCache:
+    """Test the daemon parses the tools config before serving commands."""
+
+    def test_warm_config_cache(self, isolated_home, monkeypatch):
+        """Test the config is cached for forked commands and the HOME-based lookup is not."""
+        config_path = isolated_home / '.claude-extend' / 'tools.json'
+        config_path.parent.mkdir()
+        config_path.write_text(json.dumps({'tools': {'test-tool': {'description': 'd', 'command': 'echo', 'args': []}}}))
+        monkeypatch.delenv('CLAUDE_EXTEND_CONFIG', raising=False)
+        monkeypatch.setattr(utils, '_CONFIG_CACHE', {})
+
+        daemon._warm_config_cache()
+
+        assert list(utils._CONFIG_CACHE[config_path][1]) == ['test-tool']
+        assert utils._config_candidates.cache_info().currsize == 0
+
+    def test_warm_config_cache_ignores_bad_config(self, tmp_path, monkeypatch):
+        """Test an unreadable config is left for the command to report."""
+        config_path = tmp_path / 'tools.json'
+        config_path.write_text('not json')
+        monkeypatch.setenv('CLAUDE_EXTEND_CONFIG', str(config_path))
+        monkeypatch.setattr(utils, '_CONFIG_CACHE', {})
+
+        daemon._warm_config_cache()
+
+        assert utils._CONFIG_CACHE == {}
+
+
+class TestForward:
+    """Test forwarding commands to a running daemon."""
+
+    def test_forward_without_daemon(self, tmp_path):
+        """Test forward reports no daemon so the caller can run the command itself."""
+        assert forward(['list'], tmp_path / 'missing.sock') is None
+
+    def test_forward_refuses_socket_in_shared_directory(self, tmp_path):
+        """Test nothing is sent to a socket in a directory other users can write to."""
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        shared.chmod(0o777)
+        socket_path = shared / 'cx.sock'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(socket_path))
+            listener.listen()
+            listener.setblocking(False)
+
+            assert forward(['list'], socket_path) is None
+            with pytest.raises(BlockingIOError):
+                listener.accept()
+
+    def test_forward_falls_back_when_send_fails(self, tmp_path, monkeypatch):
+        """Test a stdio fd that can't be passed (e.g. `cx-client list <&-`) makes the caller run the command itself."""
+        socket_path = tmp_path / 'cx.sock'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(socket_path))
+            listener.listen()
+            # Well above anything in use, so forward()'s own socket can't take the number.
+            closed_fd = 1000
+            with pytest.raises(OSError):
+                os.fstat(closed_fd)
+            monkeypatch.setattr(daemon, '_STDIO_FDS', (closed_fd,))
+
+            assert forward(['list'], socket_path) is None
+
+    @pytest.mark.real_subprocess
+    def test_forward_runs_command_in_daemon(self, tmp_path, capfd):
+        """Test a forwarded command writes to the caller's stdio and returns its exit code."""
+        socket_path = tmp_path / 'cx.sock'
+        server = subprocess.Popen(
+            [sys.executable, '-c', 'from claude_extend import daemon; daemon._REQUEST_TIMEOUT = 0.2; ' + _SERVE,
+             str(socket_path)],
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_for_socket(socket_path)
+
+            assert forward(['--version'], socket_path) == 0
+            assert capfd.readouterr().out == f'cx {__version__}\n'
+
+            assert forward(['bogus'], socket_path) == 2
+            assert 'invalid choice' in capfd.readouterr().err
+
+            # A client that never sends its request only delays the next one.
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+                stalled.connect(str(socket_path))
+                assert forward(['--version'], socket_path) == 0
+            capfd.readouterr()
+
+            assert forward(['--daemon'], socket_path) == 2
+            assert 'already running' in capfd.readouterr().err
+
+            second = subprocess.run([sys.executable, '-c', _SERVE, str(socket_path)], capture_output=True,
+                                    text=True, timeout=10)
+            assert second.returncode == 1
+            assert 'already running' in second.stderr
+            assert forward(['--version'], socket_path) == 0
+            assert capfd.readouterr().out == f'cx {__version__}\n'
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+        assert not socket_path.exists()
+
+    @pytest.mark.real_subprocess
+    def test_forward_interactive_command_from_terminal(self, tmp_path, isolated_home):
+        """Test a daemon started as a background job can read the client's terminal."""
+        bin_dir = tmp_path / 'bin'
+        bin_dir.mkdir()
+        claude = bin_dir / 'claude'
+        claude.write_text('#!/bin/sh\nexit 0\n')
+        claude.chmod(stat.S_IRWXU)
+        (isolated_home / '.claude.json').write_text('{}')
+        env = dict(os.environ, PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+        master, slave = os.openpty()
+        session = subprocess.Popen(
+            [sys.executable, '-c', _TERMINAL_SESSION, str(tmp_path / 'cx.sock'), _SERVE],
+            stdin=slave, stdout=slave, stderr=slave, cwd=tmp_path, env=env, start_new_session=True,
+        )
+        os.close(slave)
+        try:
+            _read_until(master, b"or 'q' to quit: ")
+            os.write(master, b'q\n')
+            assert b'Installation cancelled.' in _read_until(master, b'Installation cancelled.')
+            assert session.wait(timeout=10) == 0
+        finally:
+            if session.poll() is None:
+                session.kill()
+                session.wait()
+            os.close(master)
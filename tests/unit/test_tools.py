@@ -2,10 +2,14 @@
 
 import json
 import subprocess
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, Mock
+
+import pytest
 
 from claude_extend.tools import MCPTool, MCPToolRegistry
 
+_DEFAULT_TOOLS = ("serena", "basic-memory", "gemini-cli")
+
 
 class TestMCPTool:
     """Test cases for MCPTool class."""
@@ -17,92 +21,87 @@ class TestMCPTool:
         assert mock_tool.command == "echo"
         assert mock_tool.args == ["installing", "test-tool"]
 
-    def test_check_prerequisites_available(self, mock_tool, mock_shutil_which):
-        """Test prerequisite checking when available."""
-        mock_shutil_which.return_value = "/usr/bin/python"
-        assert mock_tool.check_prerequisites() is True
-
-    def test_check_prerequisites_missing(self, mock_tool, mock_shutil_which):
-        """Test prerequisite checking when missing."""
-        mock_shutil_which.return_value = None
-        assert mock_tool.check_prerequisites() is False
-
-    def test_check_prerequisites_command_specific(self, mock_shutil_which):
-        """Test prerequisite checking for specific commands."""
-        npx_tool = MCPTool(
-            name="test-npx",
-            description="desc",
-            command="npx",
-            args=["-y", "some-package"]
-        )
-
-        # Test with npx available
-        mock_shutil_which.side_effect = lambda cmd: "/usr/bin/npx" if cmd == "npx" else None
-        assert npx_tool.check_prerequisites() is True
-
-        # Test with npx not available
-        mock_shutil_which.side_effect = lambda cmd: None
-        assert npx_tool.check_prerequisites() is False
+    @pytest.mark.parametrize("command,found,expected", [
+        ("echo", {"echo": "/usr/bin/echo"}, True),
+        ("echo", {}, False),
+        ("npx", {"npx": "/usr/bin/npx"}, True),
+        ("npx", {"node": "/usr/bin/node"}, False),
+    ])
+    def test_check_prerequisites(self, mock_shutil_which, command, found, expected):
+        """Test a tool's prerequisites are met exactly when its own command is on PATH."""
+        mock_shutil_which.side_effect = found.get
+        tool = MCPTool(name="test", description="desc", command=command, args=[])
 
-    def test_is_installed_true(self, mock_tool):
-        """Test is_installed when tool is installed."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = True
+        assert tool.check_prerequisites() is expected
 
-        assert mock_tool.is_installed(mock_registry) is True
-        mock_registry.is_tool_installed.assert_called_once_with("test-tool")
-
-    def test_is_installed_false(self, mock_tool):
-        """Test is_installed when tool is not installed."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = False
+    def test_check_prerequisites_cached(self, mock_tool, mock_shutil_which):
+        """Test repeated prerequisite checks for one command search PATH only once."""
+        mock_shutil_which.return_value = "/usr/bin/echo"
 
-        assert mock_tool.is_installed(mock_registry) is False
-        mock_registry.is_tool_installed.assert_called_once_with("test-tool")
+        assert mock_tool.check_prerequisites() is True
+        assert mock_tool.check_prerequisites() is True
+        mock_shutil_which.assert_called_once_with("echo")
 
-    def test_is_installed_subprocess_error(self, mock_tool):
-        """Test is_installed when subprocess error occurs."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = False
+    @pytest.mark.parametrize("installed", [True, False])
+    def test_is_installed(self, mock_tool, installed):
+        """Test is_installed delegates to the registry."""
+        mock_registry = Mock(spec=MCPToolRegistry)
+        mock_registry.is_tool_installed.return_value = installed
 
-        assert mock_tool.is_installed(mock_registry) is False
+        assert mock_tool.is_installed(mock_registry) is installed
         mock_registry.is_tool_installed.assert_called_once_with("test-tool")
 
-    @patch('subprocess.run')
-    def test_install_success(self, mock_run, mock_tool):
-        """Test successful installation."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = False
-        mock_run.return_value.returncode = 0
+    @pytest.mark.parametrize("installed,returncode,expected", [
+        (False, 0, True),
+        (True, None, True),
+        (False, 1, False),
+    ])
+    def test_install(self, fp, mock_tool, installed, returncode, expected):
+        """Test install skips installed tools and reports claude mcp add success or failure."""
+        mock_registry = Mock(spec=MCPToolRegistry)
+        mock_registry.is_tool_installed.return_value = installed
+        command = ['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'test-tool']
+        if returncode is not None:
+            fp.register(command, returncode=returncode)
 
         result = mock_tool.install(mock_registry, "/test/project")
 
-        assert result is True
-        expected_command = ['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'test-tool']
-        mock_run.assert_called_once_with(expected_command, check=True)
+        assert result is expected
+        assert fp.call_count(command) == (0 if installed else 1)
+        if returncode == 0:
+            mock_registry.set_installed.assert_called_once_with("test-tool", True)
+        else:
+            mock_registry.set_installed.assert_not_called()
 
-    def test_install_already_installed(self, mock_tool):
-        """Test installing tool that's already installed."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = True
+    def test_install_skip_check(self, fp, mock_tool):
+        """Test skip_check goes straight to claude mcp add without asking the registry."""
+        mock_registry = Mock(spec=MCPToolRegistry)
+        command = ['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'test-tool']
+        fp.register(command)
 
-        result = mock_tool.install(mock_registry)
+        result = mock_tool.install(mock_registry, "/test/project", skip_check=True)
 
         assert result is True
+        mock_registry.is_tool_installed.assert_not_called()
+        assert fp.call_count(command) == 1
+
+    @pytest.mark.parametrize("stderr,expected,message", [
+        ("MCP server test-tool already exists in local config\n", True, "test-tool is already installed"),
+        ("Invalid transport\n", False, "Failed to install test-tool"),
+    ])
+    def test_install_skip_check_error(self, fp, mock_tool, capsys, stderr, expected, message):
+        """Test skip_check treats claude's duplicate-server error as installed and reports any other failure."""
+        fp.register(['claude', 'mcp', 'add', fp.any()], returncode=1, stderr=stderr)
+
+        result = mock_tool.install(Mock(spec=MCPToolRegistry), skip_check=True)
+        captured = capsys.readouterr()
 
-    @patch('subprocess.run')
-    def test_install_failure(self, mock_run, mock_tool):
-        """Test failed installation."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = False
-        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
-
-        result = mock_tool.install(mock_registry)
-
-        assert result is False
+        assert result is expected
+        assert message in captured.err
+        if not expected:
+            assert stderr in captured.err
 
-    @patch('subprocess.run')
-    def test_install_with_project_dir_placeholder(self, mock_run):
+    def test_install_with_project_dir_placeholder(self, fp):
         """Test installation with project directory placeholder replacement."""
         # Create a tool with project_dir placeholder in args
         tool_with_placeholder = MCPTool(
@@ -111,63 +110,45 @@ class TestMCPTool:
             command="echo",
             args=["installing", "in", "{project_dir}"]
         )
-
-        mock_registry = MagicMock()
+        mock_registry = Mock(spec=MCPToolRegistry)
         mock_registry.is_tool_installed.return_value = False
+        # Only the command with the placeholder replaced is registered
+        fp.register(['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'in', '/custom/project'])
 
         result = tool_with_placeholder.install(mock_registry, "/custom/project")
 
         assert result is True
-        # Verify the placeholder was replaced with the actual project directory
-        expected_command = ['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'in', '/custom/project']
-        mock_run.assert_called_once_with(expected_command, check=True)
-
-    @patch('subprocess.run')
-    def test_remove_success(self, mock_run, mock_tool):
-        """Test successful removal."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = True
-        mock_run.return_value.returncode = 0
-
-        result = mock_tool.remove(mock_registry)
-
-        assert result is True
-        mock_run.assert_called_once_with(['claude', 'mcp', 'remove', 'test-tool'], check=True)
-
-    def test_remove_not_installed(self, mock_tool):
-        """Test removing tool that's not installed."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = False
-
-        result = mock_tool.remove(mock_registry)
-
-        assert result is True
 
-    @patch('subprocess.run')
-    def test_remove_failure(self, mock_run, mock_tool):
-        """Test failed removal."""
-        mock_registry = MagicMock()
-        mock_registry.is_tool_installed.return_value = True
-        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
+    @pytest.mark.parametrize("installed,returncode,expected", [
+        (True, 0, True),
+        (False, None, True),
+        (True, 1, False),
+    ])
+    def test_remove(self, fp, mock_tool, installed, returncode, expected):
+        """Test remove skips tools that aren't installed and reports claude mcp remove success or failure."""
+        mock_registry = Mock(spec=MCPToolRegistry)
+        mock_registry.is_tool_installed.return_value = installed
+        command = ['claude', 'mcp', 'remove', 'test-tool']
+        if returncode is not None:
+            fp.register(command, returncode=returncode)
 
         result = mock_tool.remove(mock_registry)
 
-        assert result is False
+        assert result is expected
+        assert fp.call_count(command) == (1 if installed else 0)
+        if returncode == 0:
+            mock_registry.set_installed.assert_called_once_with("test-tool", False)
+        else:
+            mock_registry.set_installed.assert_not_called()
 
 
 class TestMCPToolRegistry:
     """Test cases for MCPToolRegistry class."""
 
-    def test_init(self, mock_claude_mcp_calls):
-        """Test registry initialization."""
-        registry = MCPToolRegistry()
-        assert isinstance(registry.tools, dict)
-        assert len(registry.tools) > 0
-
-        # Check that built-in tools are loaded
-        assert "serena" in registry.tools
-        assert "basic-memory" in registry.tools
-        assert "gemini-cli" in registry.tools
+    @pytest.mark.parametrize("tool_name", _DEFAULT_TOOLS)
+    def test_default_tool_present(self, default_registry, tool_name):
+        """Test each built-in tool is loaded when no external config exists."""
+        assert default_registry.tools[tool_name].name == tool_name
 
     def test_get_tool_exists(self, mock_registry):
         """Test getting an existing tool."""
@@ -192,55 +173,220 @@ class TestMCPToolRegistry:
         names = mock_registry.get_tool_names()
         assert set(names) == {"test-tool", "another-tool"}
 
-    @patch('claude_extend.tools.MCPTool.is_installed')
-    def test_get_installed_tools(self, mock_is_installed, mock_registry):
+    def test_get_installed_tools(self, mock_registry):
         """Test getting installed tools."""
-        # Mock test-tool as installed, another-tool as not installed
-        mock_is_installed.side_effect = lambda *args, **kwargs: mock_is_installed.call_count == 1
-
-        installed = mock_registry.get_installed_tools()
+        with patch.object(mock_registry, '_get_installed_tools_output', return_value=b"test-tool: echo\n"):
+            installed = mock_registry.get_installed_tools()
         assert installed == ["test-tool"]
 
-    @patch('claude_extend.tools.MCPTool.is_installed')
-    def test_get_available_tools(self, mock_is_installed, mock_registry):
+    def test_get_available_tools(self, mock_registry):
         """Test getting available (not installed) tools."""
-        # Mock test-tool as installed, another-tool as not installed
-        mock_is_installed.side_effect = lambda *args, **kwargs: mock_is_installed.call_count == 1
-
-        available = mock_registry.get_available_tools()
+        with patch.object(mock_registry, '_get_installed_tools_output', return_value=b"test-tool: echo\n"):
+            available = mock_registry.get_available_tools()
         assert available == ["another-tool"]
 
+    def test_partition_tools(self, mock_registry):
+        """Test partition_tools splits tools into installed and available in registry order."""
+        mock_registry.tools["third-tool"] = MCPTool("third-tool", "Third Tool", "echo", [])
+        with patch.object(mock_registry, '_get_installed_tools_output', return_value=b"third-tool: echo\n") as mock_output:
+            installed, available = mock_registry.partition_tools()
+
+        assert installed == ["third-tool"]
+        assert available == ["test-tool", "another-tool"]
+        mock_output.assert_called_once()
+
+    def test_installed_names_parsed_once(self, mock_registry, mock_claude_mcp_calls):
+        """Test one `claude mcp list` call answers every installed-state query."""
+        mock_claude_mcp_calls.return_value.stdout = (
+            "Checking MCP server health...\n\n"
+            "test-tool: echo installing test-tool - ✓ Connected\n"
+            "other: another-tool:latest - ✓ Connected\n"
+        ).encode('utf-8')
+
+        assert mock_registry.get_installed_tools() == ["test-tool"]
+        assert mock_registry.get_available_tools() == ["another-tool"]
+        assert mock_registry.is_tool_installed("test-tool") is True
+        assert mock_registry.is_tool_installed("another-tool") is False
+        mock_claude_mcp_calls.assert_called_once()
+
+    def test_install_many(self, mock_registry, mock_claude_mcp_calls, mock_claude_popen):
+        """Test install_many starts one claude mcp add per tool and collects every exit code."""
+        mock_claude_mcp_calls.return_value.stdout = b"another-tool: echo\n"
+        mock_registry.tools["third-tool"] = MCPTool("third-tool", "Third Tool", "echo", ["{project_dir}"])
+
+        results = mock_registry.install_many(['test-tool', 'another-tool', 'third-tool', 'test-tool'],
+                                             "/test/project", jobs=1)
+
+        assert results == {'test-tool': True, 'another-tool': True, 'third-tool': True}
+        assert [c.args[0] for c in mock_claude_popen.call_args_list] == [
+            ['claude', 'mcp', 'add', 'test-tool', '--', 'echo', 'installing', 'test-tool'],
+            ['claude', 'mcp', 'add', 'third-tool', '--', 'echo', '/test/project'],
+        ]
+        assert mock_claude_popen.return_value.communicate.call_count == 2
+
+    def test_install_many_reports_failures(self, mock_registry, mock_claude_mcp_calls, mock_claude_popen, capsys):
+        """Test a failing child is reported with its stderr while the others still succeed."""
+        mock_claude_mcp_calls.return_value.stdout = b"another-tool: echo\n"
+        failing, succeeding = MagicMock(returncode=1), MagicMock(returncode=0)
+        failing.communicate.return_value = (None, "boom\n")
+        succeeding.communicate.return_value = (None, "")
+        mock_claude_popen.side_effect = [failing, succeeding]
+
+        results = mock_registry.install_many(['test-tool', 'another-tool'], jobs=2)
+        captured = capsys.readouterr()
 
-class TestMCPToolRegistryExternalConfig:
-    """Test MCPToolRegistry with external configuration."""
+        assert results == {'test-tool': False, 'another-tool': True}
+        assert 'boom' in captured.err
+        assert 'Failed to install test-tool' in captured.err
 
-    def test_load_tools_with_external_config(self, tmp_path, monkeypatch, mock_claude_mcp_calls):
-        """Test loading tools from external config file with new format."""
-        from claude_extend.tools import MCPToolRegistry
-        
-        # Create external config with new format (no name field)
-        config_data = {
-            "tools": {
-                "custom-tool": {
-                    "description": "Custom Tool - A custom MCP tool",
-                    "command": "python",
-                    "args": ["-m", "custom_tool"]
-                }
-            }
-        }
+    def test_install_many_rechecks_concurrent_installs(self, mock_registry, mock_claude_mcp_calls, mock_claude_popen,
+                                                        capsys):
+        """Test a concurrent install that exits 0 but is missing from the config afterwards is reported as failed."""
+        mock_claude_mcp_calls.return_value.stdout = b"another-tool: echo\n"
 
-        config_file = tmp_path / "tools.json"
-        config_file.write_text(json.dumps(config_data))
+        results = mock_registry.install_many(['test-tool', 'another-tool'], jobs=2, skip_check=True)
+        captured = capsys.readouterr()
 
-        # Mock the utils functions properly
-        def mock_get_config_path():
-            return config_file
+        assert results == {'test-tool': False, 'another-tool': True}
+        assert "test-tool is missing from the Claude config" in captured.err
+        mock_claude_mcp_calls.assert_called_once_with(['claude', 'mcp', 'list'], capture_output=True)
+
+    def test_install_many_nothing_to_do(self, mock_registry, mock_claude_mcp_calls, mock_claude_popen):
+        """Test install_many with no names does not touch the Claude CLI."""
+        assert mock_registry.install_many([]) == {}
+        mock_claude_mcp_calls.assert_not_called()
+        mock_claude_popen.assert_not_called()
+
+    def test_installed_names_from_claude_config(self, mock_registry, mock_claude_mcp_calls, isolated_home,
+                                                 tmp_path, monkeypatch):
+        """Test installed servers are read from Claude's config files without running the CLI."""
+        project = tmp_path / "project"
+        project.mkdir()
+        monkeypatch.chdir(project)
+        (isolated_home / ".claude.json").write_text(json.dumps({
+            "mcpServers": {"user-tool": {}},
+            "projects": {
+                str(project): {"mcpServers": {"test-tool": {}}},
+                "/elsewhere": {"mcpServers": {"another-tool": {}}},
+            },
+        }))
+        (project / ".mcp.json").write_text(json.dumps({"mcpServers": {"shared-tool": {}}}))
+
+        assert mock_registry._get_installed_names() == frozenset({"user-tool", "test-tool", "shared-tool"})
+        assert mock_registry.get_installed_tools() == ["test-tool"]
+        mock_claude_mcp_calls.assert_not_called()
+
+    @pytest.mark.parametrize("config", [
+        "not json",
+        json.dumps(["a list"]),
+        json.dumps({"mcpServers": ["test-tool"]}),
+        json.dumps({"projects": {"/": "bad"}}),
+    ])
+    def test_installed_names_unexpected_config_falls_back(self, mock_registry, mock_claude_mcp_calls,
+                                                          isolated_home, monkeypatch, config):
+        """Test an unreadable or unexpected ~/.claude.json falls back to `claude mcp list`."""
+        monkeypatch.chdir("/")
+        (isolated_home / ".claude.json").write_text(config)
+        mock_claude_mcp_calls.return_value.stdout = b"test-tool: echo\n"
+
+        assert mock_registry.get_installed_tools() == ["test-tool"]
+        mock_claude_mcp_calls.assert_called_once()
+
+    def test_installed_names_custom_config_dir_uses_cli(self, mock_registry, mock_claude_mcp_calls,
+                                                        isolated_home, monkeypatch):
+        """Test CLAUDE_CONFIG_DIR disables the file fast path since the config lives elsewhere."""
+        (isolated_home / ".claude.json").write_text(json.dumps({"mcpServers": {"another-tool": {}}}))
+        monkeypatch.setenv('CLAUDE_CONFIG_DIR', str(isolated_home / "custom"))
+        mock_claude_mcp_calls.return_value.stdout = b"test-tool: echo\n"
+
+        assert mock_registry.get_installed_tools() == ["test-tool"]
+        mock_claude_mcp_calls.assert_called_once()
+
+    def test_refresh_reloads_installed_tools(self, mock_registry, mock_claude_mcp_calls):
+        """Test refresh() drops the cached listing so the next query re-runs `claude mcp list`."""
+        assert mock_registry.is_tool_installed("test-tool") is False
+
+        mock_claude_mcp_calls.return_value.stdout = b"test-tool: echo\n"
+        mock_registry.refresh()
+
+        assert mock_registry.is_tool_installed("test-tool") is True
+        assert mock_claude_mcp_calls.call_count == 2
+
+    @pytest.mark.parametrize("failure", [
+        pytest.param({'side_effect': subprocess.SubprocessError}, id="raises"),
+        pytest.param({'return_value.returncode': 1}, id="exit-status"),
+    ])
+    def test_installed_names_when_claude_mcp_list_fails(self, mock_registry, mock_claude_mcp_calls, failure):
+        """Test a failing `claude mcp list` is treated as nothing installed."""
+        mock_claude_mcp_calls.configure_mock(**failure)
+        mock_claude_mcp_calls.return_value.stdout = b"test-tool: echo\n"
+
+        assert mock_registry.is_tool_installed("test-tool") is False
+        assert mock_registry.get_installed_tools() == []
+
+    def test_snapshot(self, mock_registry):
+        """Test snapshot returns the tools and the set of installed names in one pass."""
+        with patch.object(mock_registry, '_get_installed_tools_output', return_value=b"test-tool: echo\n"):
+            tools, installed = mock_registry.snapshot()
+
+        assert tools is mock_registry.tools
+        assert installed == frozenset({"test-tool"})
+
+    def test_get_prerequisite_status(self, mock_registry, mock_shutil_which):
+        """Test prerequisite status is reported per tool."""
+        mock_shutil_which.return_value = None
 
-        def mock_load_external_tools_config(path):
-            return config_data["tools"]
+        status = mock_registry.get_prerequisite_status()
 
-        monkeypatch.setattr('claude_extend.utils.get_config_path', mock_get_config_path)
-        monkeypatch.setattr('claude_extend.utils.load_external_tools_config', mock_load_external_tools_config)
+        assert status == {"test-tool": False, "another-tool": False}
+
+    def test_get_prerequisite_status_resolves_each_command_once(self, mock_registry, mock_shutil_which):
+        """Test tools sharing a command trigger one lookup, reused for the rest of the run."""
+        mock_registry.get_prerequisite_status()
+        mock_registry.get_prerequisite_status()
+
+        mock_shutil_which.assert_called_once_with("echo")
+
+    def test_get_prerequisite_status_uses_cache(self, mock_registry, mock_shutil_which, tmp_path):
+        """Test resolved commands are reused from the on-disk cache on the next run."""
+        executable = tmp_path / "echo"
+        executable.write_text("")
+        executable.chmod(0o755)
+        mock_shutil_which.return_value = str(executable)
+
+        assert mock_registry.get_prerequisite_status() == {"test-tool": True, "another-tool": True}
+        assert mock_shutil_which.call_count == 1
+
+        mock_shutil_which.reset_mock()
+        mock_registry._command_paths.clear()  # simulate a new cx invocation
+        assert mock_registry.get_prerequisite_status() == {"test-tool": True, "another-tool": True}
+        mock_shutil_which.assert_not_called()
+
+        assert mock_registry.get_prerequisite_status(refresh=True) == {"test-tool": True, "another-tool": True}
+        mock_shutil_which.assert_called_once_with("echo")
+
+    def test_get_prerequisite_status_rechecks_stale_cache(self, mock_registry, mock_shutil_which, tmp_path):
+        """Test a cached command that no longer exists is looked up again."""
+        executable = tmp_path / "echo"
+        executable.write_text("")
+        executable.chmod(0o755)
+        mock_shutil_which.return_value = str(executable)
+        mock_registry.get_prerequisite_status()
+
+        executable.unlink()
+        mock_shutil_which.return_value = None
+        mock_registry._command_paths.clear()  # simulate a new cx invocation
+
+        assert mock_registry.get_prerequisite_status() == {"test-tool": False, "another-tool": False}
+        mock_shutil_which.assert_called_with("echo")
+
+
+class TestMCPToolRegistryExternalConfig:
+    """Test MCPToolRegistry with external configuration."""
+
+    def test_load_tools_with_external_config(self, custom_tools_config, monkeypatch, mock_claude_mcp_calls):
+        """Test loading tools from external config file with new format."""
+        monkeypatch.setattr('claude_extend.utils.get_config_path', lambda: custom_tools_config)
 
         # Create registry
         registry = MCPToolRegistry()
@@ -320,8 +466,6 @@ class TestMCPToolRegistryExternalConfig:
 
     def test_load_tools_external_config_failure_fallback(self, tmp_path, monkeypatch, capsys, mock_claude_mcp_calls):
         """Test fallback to defaults when external config fails."""
-        from claude_extend.tools import MCPToolRegistry
-
         # Create invalid config file
         config_file = tmp_path / "tools.json"
         config_file.write_text("invalid json{")
@@ -336,29 +480,44 @@ class TestMCPToolRegistryExternalConfig:
         registry = MCPToolRegistry()
 
         # Should have default tools
-        assert "serena" in registry.tools
-        assert "basic-memory" in registry.tools
-        assert "gemini-cli" in registry.tools
+        assert set(registry.tools) == set(_DEFAULT_TOOLS)
 
         # Should show warning message
         captured = capsys.readouterr()
         assert "Failed to load or parse external config" in captured.err
 
-    def test_load_tools_no_external_config(self, monkeypatch, mock_claude_mcp_calls):
-        """Test loading with no external config (defaults only)."""
-        from claude_extend.tools import MCPToolRegistry
+    @pytest.mark.parametrize("tools_config,reason", [
+        (["serena"], "'tools' must map tool names"),
+        ({"bad": "uvx"}, "tool 'bad' must be an object"),
+        ({"bad": {"description": "Bad", "args": []}}, "tool 'bad' needs a string 'command'"),
+        ({"bad": {"description": "Bad", "command": "uvx", "args": "run"}}, "tool 'bad' needs 'args' as a list"),
+    ])
+    def test_load_tools_invalid_tool_definition(self, tmp_path, monkeypatch, capsys, mock_claude_mcp_calls,
+                                                tools_config, reason):
+        """Test a malformed tool definition is rejected with its reason and the defaults are used."""
+        config_file = tmp_path / "tools.json"
+        config_file.write_text(json.dumps({"tools": tools_config}))
+        monkeypatch.setattr('claude_extend.utils.get_config_path', lambda: config_file)
 
-        # Mock get_config_path to return None
-        def mock_get_config_path():
-            return None
+        registry = MCPToolRegistry()
 
-        monkeypatch.setattr('claude_extend.utils.get_config_path', mock_get_config_path)
+        assert set(registry.tools) == set(_DEFAULT_TOOLS)
+        captured = capsys.readouterr()
+        assert "Failed to load or parse external config" in captured.err
+        assert reason in captured.err
+
+    def test_load_tools_no_external_config(self, default_registry):
+        """Test loading with no external config (defaults only)."""
+        assert set(default_registry.tools) == set(_DEFAULT_TOOLS)
+
+    def test_tools_loaded_on_first_access(self, monkeypatch, mock_claude_mcp_calls):
+        """Test the registry reads its config on first use of tools, and only once."""
+        calls = []
+        monkeypatch.setattr('claude_extend.utils.get_config_path', lambda: calls.append(1))
 
-        # Create registry - should use defaults
         registry = MCPToolRegistry()
+        assert calls == []
 
-        # Should have default tools
-        assert "serena" in registry.tools
-        assert "basic-memory" in registry.tools
-        assert "gemini-cli" in registry.tools
-        assert len(registry.tools) == 3
+        registry.get_tool_names()
+        registry.list_tools()
+        assert calls == [1]
@@ -9,23 +9,22 @@ from claude_extend.utils import (
     validate_interactive_environment
 )
 
+# Config file contents, encoded once for the tests that write them
+_EMPTY_TOOLS_PAYLOAD = json.dumps({"tools": {}})
+_TEST_TOOL_CONFIG = {"description": "Test Tool", "command": "python", "args": ["-m", "test_tool"]}
+_TEST_TOOL_PAYLOAD = json.dumps({"tools": {"test-tool": _TEST_TOOL_CONFIG}})
+
 
 class TestColors:
     """Test cases for Colors class."""
 
-    def test_color_constants(self):
-        """Test that color constants are defined."""
-        assert hasattr(Colors, 'RED')
-        assert hasattr(Colors, 'GREEN')
-        assert hasattr(Colors, 'YELLOW')
-        assert hasattr(Colors, 'BLUE')
-        assert hasattr(Colors, 'NC')
-
-        # Test they're strings starting with ANSI escape
-        assert Colors.RED.startswith('\033[')
-        assert Colors.GREEN.startswith('\033[')
-        assert Colors.YELLOW.startswith('\033[')
-        assert Colors.BLUE.startswith('\033[')
+    @pytest.mark.parametrize("name", ['RED', 'GREEN', 'YELLOW', 'BLUE', 'NC'])
+    def test_color_constants(self, name):
+        """Test that each color constant is an ANSI escape sequence."""
+        assert getattr(Colors, name).startswith('\033[')
+
+    def test_reset_constant(self):
+        """Test that NC resets all attributes."""
         assert Colors.NC == '\033[0m'
 
 
@@ -37,201 +36,146 @@ class TestPrintMessage:
         ('success', '✅', Colors.GREEN),
         ('warning', '⚠️', Colors.YELLOW),
         ('error', '❌', Colors.RED),
+        ('unknown', 'ℹ️', Colors.BLUE),  # Unknown levels fall back to info
     ])
-    def test_print_message_levels(self, level, expected_icon, expected_color, capsys):
-        """Test printing messages for different levels."""
+    def test_print_message(self, level, expected_icon, expected_color, capsys):
+        """Test each level's icon and color, with the color reset at the end of the line."""
         message = f"Test {level} message"
         print_message(level, message)
         captured = capsys.readouterr()
 
-        assert message in captured.err
-        assert expected_icon in captured.err
-        assert expected_color in captured.err
-        if level == 'info':  # Only info includes NC (reset color)
-            assert Colors.NC in captured.err
-
-    def test_print_message_unknown_level(self, capsys):
-        """Test printing with unknown level defaults to info."""
-        print_message('unknown', 'Unknown level')
-        captured = capsys.readouterr()
-
-        assert 'Unknown level' in captured.err
-        assert 'ℹ️' in captured.err
-        assert Colors.BLUE in captured.err
+        assert captured.err == f"{expected_color}{expected_icon}  {message}{Colors.NC}\n"
 
 
 class TestValidateEnvironment:
-    """Test cases for validate_environment function."""
-
-    @patch('pathlib.Path.exists')
-    @patch('shutil.which')
-    def test_validate_environment_success(self, mock_which, mock_exists, capsys):
-        """Test successful environment validation."""
-        # Mock project file exists and claude CLI available
-        mock_exists.side_effect = lambda: mock_exists.call_count == 1  # First call returns True
-        mock_which.return_value = '/usr/bin/claude'
-
-        result = validate_environment()
+    """Test cases for validate_environment and validate_interactive_environment."""
 
-        assert result is True
-        captured = capsys.readouterr()
-        assert '✅' in captured.err
-        assert 'Project directory detected' in captured.err
-
-    @patch('pathlib.Path.exists')
+    @pytest.mark.parametrize("entry,claude_path,expected,fragment", [
+        ('pyproject.toml', '/usr/bin/claude', True, '✅  Project directory detected'),
+        ('README.md', '/usr/bin/claude', True, '⚠️  No project directory detected'),
+        ('.git/', None, False, '❌  Claude CLI not found'),
+    ])
+    def test_validate_environment(self, tmp_path, monkeypatch, capsys, entry, claude_path, expected, fragment):
+        """Test project detection and the Claude CLI check."""
+        if entry.endswith('/'):
+            (tmp_path / entry).mkdir()
+        else:
+            (tmp_path / entry).touch()
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr('shutil.which', lambda command: claude_path)
+
+        assert validate_environment() is expected
+        assert fragment in capsys.readouterr().err
+
+    @patch('os.path.exists')
+    @patch('os.scandir')
     @patch('shutil.which')
-    def test_validate_environment_no_project_files(self, mock_which, mock_exists, capsys):
-        """Test validation warning when no project files found."""
-        mock_exists.return_value = False
+    def test_validate_environment_unreadable_cwd(self, mock_which, mock_scandir, mock_exists, capsys):
+        """Test project detection falls back to per-file checks when the directory can't be listed."""
+        mock_scandir.side_effect = PermissionError
+        mock_exists.side_effect = lambda path: path == 'go.mod'
         mock_which.return_value = '/usr/bin/claude'
 
-        result = validate_environment()
-
-        assert result is True
-        captured = capsys.readouterr()
-        assert '⚠️' in captured.err
-        assert 'No project directory detected' in captured.err
-
-    @patch('pathlib.Path.exists')
-    @patch('shutil.which')
-    def test_validate_environment_no_claude_cli(self, mock_which, mock_exists, capsys):
-        """Test validation failure when Claude CLI not found."""
-        mock_exists.side_effect = lambda: mock_exists.call_count == 1  # First call returns True
-        mock_which.return_value = None
-
-        result = validate_environment()
-
-        assert result is False
-        captured = capsys.readouterr()
-        assert '❌' in captured.err
-        assert 'Claude CLI not found' in captured.err
-
-
-class TestValidateInteractiveEnvironment:
-    """Test cases for validate_interactive_environment function."""
-
-    @patch('claude_extend.utils.validate_environment')
-    @patch('sys.stdin.isatty')
-    def test_validate_interactive_success(self, mock_isatty, mock_validate_env):
-        """Test successful interactive environment validation."""
-        mock_validate_env.return_value = True
-        mock_isatty.return_value = True
-
-        result = validate_interactive_environment()
-
-        assert result is True
+        assert validate_environment() is True
+        assert 'Project directory detected' in capsys.readouterr().err
 
-    @patch('claude_extend.utils.validate_environment')
-    def test_validate_interactive_environment_fail(self, mock_validate_env):
-        """Test failure when base environment validation fails."""
-        mock_validate_env.return_value = False
-
-        result = validate_interactive_environment()
-
-        assert result is False
-
-    @patch('claude_extend.utils.validate_environment')
-    @patch('sys.stdin.isatty')
-    def test_validate_interactive_not_tty(self, mock_isatty, mock_validate_env, capsys):
-        """Test failure when not in interactive terminal."""
-        mock_validate_env.return_value = True
-        mock_isatty.return_value = False
-
-        result = validate_interactive_environment()
+    @pytest.mark.parametrize("base_ok,isatty,expected,fragment", [
+        (True, True, True, ''),
+        (False, True, False, ''),
+        (True, False, False, 'interactive input'),
+    ])
+    def test_validate_interactive_environment(self, monkeypatch, capsys, base_ok, isatty, expected, fragment):
+        """Test interactive mode needs both the base checks and a terminal on stdin."""
+        monkeypatch.setattr('claude_extend.utils.validate_environment', lambda: base_ok)
+        monkeypatch.setattr('sys.stdin.isatty', lambda: isatty)
 
-        assert result is False
-        captured = capsys.readouterr()
-        assert 'interactive input' in captured.err
+        assert validate_interactive_environment() is expected
+        assert fragment in capsys.readouterr().err
 
 
 class TestConfigPath:
     """Test config path functionality."""
 
-    def test_get_config_path_environment_variable(self, tmp_path, monkeypatch):
-        """Test config path from environment variable."""
-        from claude_extend.utils import get_config_path
-
-        config_file = tmp_path / "custom_tools.json"
-        config_file.write_text('{"tools": {}}')
-
-        monkeypatch.setenv('CLAUDE_EXTEND_CONFIG', str(config_file))
-
-        result = get_config_path()
-        assert result == config_file
-
-    def test_get_config_path_standard_locations(self, tmp_path, monkeypatch):
-        """Test config path from standard locations."""
+    @pytest.mark.parametrize("env_config,files,expected", [
+        pytest.param("custom_tools.json", ["custom_tools.json", ".config/claude-extend/tools.json"],
+                     "custom_tools.json", id="env"),
+        pytest.param(None, [".config/claude-extend/tools.json", ".claude-extend/tools.json"],
+                     ".config/claude-extend/tools.json", id="standard"),
+        pytest.param(None, [".claude-extend/tools.json"], ".claude-extend/tools.json", id="home"),
+        pytest.param("missing.json", [], None, id="none"),
+    ])
+    def test_get_config_path(self, tmp_path, monkeypatch, env_config, files, expected):
+        """Test the env var wins over the standard locations, which are checked in order."""
         from claude_extend.utils import get_config_path
 
-        # Mock home directory
         monkeypatch.setattr('pathlib.Path.home', lambda: tmp_path)
-
-        # Create config in first standard location
-        config_dir = tmp_path / '.config' / 'claude-extend'
-        config_dir.mkdir(parents=True)
-        config_file = config_dir / 'tools.json'
-        config_file.write_text('{"tools": {}}')
-
-        result = get_config_path()
-        assert result == config_file
-
-    def test_get_config_path_no_config_found(self, tmp_path, monkeypatch):
-        """Test when no config file exists."""
+        if env_config:
+            monkeypatch.setenv('CLAUDE_EXTEND_CONFIG', str(tmp_path / env_config))
+        else:
+            monkeypatch.delenv('CLAUDE_EXTEND_CONFIG', raising=False)
+        for relative in files:
+            (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / relative).write_text(_EMPTY_TOOLS_PAYLOAD)
+
+        assert get_config_path() == (tmp_path / expected if expected else None)
+
+    def test_get_config_path_home_resolved_once(self, tmp_path, monkeypatch):
+        """Test standard locations are built once while the env var is still read on every call."""
         from claude_extend.utils import get_config_path
 
-        # Mock home directory to empty location
-        monkeypatch.setattr('pathlib.Path.home', lambda: tmp_path)
+        home_calls = []
+        monkeypatch.setattr('pathlib.Path.home', lambda: home_calls.append(1) or tmp_path)
         monkeypatch.delenv('CLAUDE_EXTEND_CONFIG', raising=False)
 
-        result = get_config_path()
-        assert result is None
+        assert get_config_path() is None
+        assert get_config_path() is None
+        assert home_calls == [1]
+
+        config_file = tmp_path / "custom_tools.json"
+        config_file.write_text(_EMPTY_TOOLS_PAYLOAD)
+        monkeypatch.setenv('CLAUDE_EXTEND_CONFIG', str(config_file))
+        assert get_config_path() == config_file
 
 
 class TestLoadExternalConfig:
     """Test external config loading functionality."""
 
-    def test_load_external_tools_config_valid(self, tmp_path):
-        """Test loading valid external config."""
+    @pytest.mark.parametrize("payload,expected_keys", [
+        pytest.param({"tools": {"test-tool": {"description": "Test Tool"}}}, {"test-tool"}, id="tools"),
+        pytest.param({"tools": {}}, set(), id="empty"),
+        pytest.param({"other": "data"}, set(), id="missing-tools-key"),
+    ])
+    def test_load_external_tools_config(self, tmp_path, payload, expected_keys):
+        """Test the loader returns the 'tools' mapping, or nothing when it is empty or absent."""
         from claude_extend.utils import load_external_tools_config
 
-        config_data = {
-            "tools": {
-                "test-tool": {
-                    "name": "test-tool",
-                    "description": "Test Tool",
-                    "prerequisite": "python",
-                    "error_message": "Python not found",
-                    "install_command": ["echo", "test"]
-                }
-            }
-        }
-
         config_file = tmp_path / "tools.json"
-        config_file.write_text(json.dumps(config_data))
+        config_file.write_text(json.dumps(payload))
 
-        result = load_external_tools_config(config_file)
-        assert "test-tool" in result
-        assert result["test-tool"]["name"] == "test-tool"
-        assert result["test-tool"]["description"] == "Test Tool"
+        assert set(load_external_tools_config(config_file)) == expected_keys
 
-    def test_load_external_tools_config_empty(self, tmp_path):
-        """Test loading config with no tools."""
+    def test_load_external_tools_config_field_values(self, tmp_path):
+        """Test a tool's fields are returned as written."""
         from claude_extend.utils import load_external_tools_config
 
-        config_data = {"tools": {}}
         config_file = tmp_path / "tools.json"
-        config_file.write_text(json.dumps(config_data))
+        config_file.write_text(_TEST_TOOL_PAYLOAD)
 
-        result = load_external_tools_config(config_file)
-        assert result == {}
+        assert load_external_tools_config(config_file)["test-tool"] == _TEST_TOOL_CONFIG
 
-    def test_load_external_tools_config_missing_tools_key(self, tmp_path):
-        """Test loading config without tools key."""
+    def test_load_external_tools_config_reuses_parse(self, tmp_path):
+        """Test an unchanged config is parsed once and a modified one is parsed again."""
         from claude_extend.utils import load_external_tools_config
 
-        config_data = {"other": "data"}
         config_file = tmp_path / "tools.json"
-        config_file.write_text(json.dumps(config_data))
+        config_file.write_text(json.dumps({"tools": {"a": {}}}))
+
+        with patch('json.loads', wraps=json.loads) as mock_load:
+            first = load_external_tools_config(config_file)
+            second = load_external_tools_config(config_file)
+            assert mock_load.call_count == 1
+            assert second is first
 
-        result = load_external_tools_config(config_file)
-        assert result == {}
+            config_file.write_text(json.dumps({"tools": {"a": {}, "b": {}}}))
+            assert set(load_external_tools_config(config_file)) == {"a", "b"}
+            assert mock_load.call_count == 2